@@ -1,21 +1,156 @@
-from sys import argv
+import os
+from os import pathsep
+from sys import argv, getrecursionlimit, setrecursionlimit, stderr, stdin
+import threading
+from time import perf_counter
+from .internal.private.budgets import Limits, budgets
 from .internal.private.handler import Handler
 from .internal.private.parser import Parser
+from .internal.private.diskcache import disk_cache
+from .internal.private.files import file_table
+from .internal.private.modules import module_registry
+from .internal.private.optimizer import optimizer
+from .internal.private.processes import process_pool
+from .internal.private.profiler import profiler
+from .internal.private.repl import Repl
+from .internal.private.stats import stats
+from .internal.private.workers import worker_pool
 from .internal.public.file import File
+from .internal.public.layer import Layer
 from .internal.public.safe import safe
 from .internal.public.parsedmaterial import ParsedMaterial
 
+def getLimits(handler: Handler) -> Limits | None:
+    options: list[str] = ["--max-steps", "--max-time", "--max-subprocess-time", "--max-memory"]
+    if not any(handler.get(option) for option in options):
+        return None
+    return Limits(
+        "run",
+        int(handler.get("--max-steps")) if handler.get("--max-steps") else None,
+        float(handler.get("--max-time")) if handler.get("--max-time") else None,
+        float(handler.get("--max-subprocess-time")) if handler.get("--max-subprocess-time") else None,
+        int(float(handler.get("--max-memory")) * (1 << 20)) if handler.get("--max-memory") else None
+    )
+
+def runServo(handler: Handler, parser: Parser, path: str | None) -> None:
+    # every run, including each one of --watch, --batch and the daemon, starts with the full budget
+    with budgets.limit(getLimits(handler)):
+        runScript(handler, parser, path)
+
+def runScript(handler: Handler, parser: Parser, path: str | None) -> None:
+    if path is None or path == "-":
+        if stdin.isatty():
+            Repl(parser).run()
+        else:
+            with stats.phase("execute"):
+                parser.stream(stdin)
+        return
+    if parser.file.getType() != "file":
+        raise FileNotFoundError(f"tried to run servo file that is a directory or does not exist:\n        - {parser.file.getPath()}")
+    if handler.has("--stream"):
+        with open(parser.file.getPath()) as reader, stats.phase("execute"):
+            parser.stream(reader)
+        return
+    with stats.phase("read"):
+        parser.file.read()
+    parsed: ParsedMaterial = parser.parse()
+    with stats.phase("execute"):
+        parsed.execute()
+
+def runDeep(handler: Handler, parser: Parser, path: str | None) -> None:
+    # calls nested inside expressions still recurse through python, deep limits need a bigger stack
+    threading.stack_size(min(Parser.max_depth * 2048 + (1 << 20), 1 << 30))
+    errors: list[BaseException] = []
+    def target() -> None:
+        try:
+            runServo(handler, parser, path)
+        except BaseException as e:
+            errors.append(e)
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join()
+    if errors:
+        raise errors[0]
+
 @safe
 def initServo() -> None:
     """servo.base"""
     handler: Handler = Handler(argv[1:])
-    parser: Parser = Parser(File((handler.get("-m").replace(".", "/") + ".sv") if handler.get("-m") else handler.get(0), no_read=True))
-    if not parser.file.path:
-        raise RuntimeError("please provide a servo file as argument 1.")
-    if parser.file.getType() != "file":
-        raise FileNotFoundError(f"tried to run servo file that is a directory or does not exist:\n        - {parser.file.getPath()}")
-    parser.file.read()
-    parsed: ParsedMaterial = parser.parse()
-    parsed.execute()
+    disk_cache.directory = handler.get("--cache-dir", disk_cache.directory)
+    disk_cache.enabled = disk_cache.enabled and not handler.has("--no-cache")
+    if handler.has("-O"):
+        optimizer.enabled = True
+        disk_cache.variant = "opt"
+    if handler.get("--path"):
+        module_registry.setSearchPath(["", *handler.get("--path").split(pathsep), *module_registry.search_path[1:]])
+    if handler.has("--daemon"):
+        # options given to the daemon become the defaults of every run it forks
+        # imported here so ordinary runs do not pay for the socket machinery
+        from .internal.private.daemon import Daemon
+        daemon: Daemon = Daemon(initServo, handler.get("--socket"))
+        daemon.preload(handler.get("--preload").split(",") if handler.get("--preload") else [])
+        daemon.serve()
+        return
+    if handler.get("--batch"):
+        # imported here like the daemon, a single script run never needs the pool
+        from .internal.private.batch import Batch
+        options: list[str] = []
+        skip: bool = False
+        for arg in argv[1:]:
+            if skip or arg in ("--batch", "-j", "--report", "--preload"):
+                skip = not skip
+                continue
+            options.append(arg)
+        batch: Batch = Batch(initServo, handler.get("--batch"), int(handler.get("-j", os.cpu_count() or 1)), options)
+        started: float = perf_counter()
+        results: list[dict] = batch.execute(handler.get("--preload").split(",") if handler.get("--preload") else [])
+        print(batch.summarize(results, perf_counter() - started), file=stderr)
+        batch.writeReport(results, perf_counter() - started, handler.get("--report", "servo-batch.json"))
+        if any(result["exit_code"] != 0 for result in results):
+            raise SystemExit(1)
+        return
+    path: str | None = (handler.get("-m").replace(".", "/") + ".sv") if handler.get("-m") else handler.get(0)
+    parser: Parser = Parser(File("<stdin>" if path is None or path == "-" else path, no_read=True))
+    if handler.has("-p"):
+        profiler.enabled = True
+        root: Layer = Layer(f"{parser.file.getBaseName().removesuffix('.sv')}.<main>", "script", parser)
+        profiler.enter(root)
+    if handler.get("--max-procs"):
+        process_pool.max_processes = int(handler.get("--max-procs"))
+    if handler.get("--workers"):
+        worker_pool.max_workers = int(handler.get("--workers"))
+    if handler.get("--pool"):
+        if handler.get("--pool") not in ("thread", "process"):
+            raise ValueError(f"--pool expects 'thread' or 'process', got '{handler.get('--pool')}'")
+        worker_pool.kind = handler.get("--pool")
+    default_depth: int = Parser.max_depth
+    if handler.get("--max-depth"):
+        Parser.max_depth = int(handler.get("--max-depth"))
+    # each servo level nested inside an expression costs a handful of python frames
+    setrecursionlimit(max(getrecursionlimit(), Parser.max_depth * 8 + 1000))
+    try:
+        if handler.has("--watch"):
+            if parser.file.getType() != "file":
+                raise FileNotFoundError(f"--watch needs a servo file to run:\n        - {parser.file.getPath()}")
+            # imported here like the daemon, a single run never polls anything
+            from .internal.private.watcher import Watcher
+            Watcher(lambda: runServo(handler, Parser(File(parser.file.getPath(), no_read=True)), path), parser.file.getPath(), float(handler.get("--interval", 0.25))).watch()
+        elif Parser.max_depth > default_depth:
+            runDeep(handler, parser, path)
+        else:
+            runServo(handler, parser, path)
+        # spawned commands the script never waited for still finish before servo exits, and fail it if they failed
+        process_pool.shutdown()
+    finally:
+        # after an error the run's own failure is the one reported, the commands are only waited for
+        process_pool.shutdown(check=False)
+        file_table.closeAll()
+        if profiler.enabled:
+            profiler.leave(root)
+            print(profiler.report(), file=stderr)
+            if handler.get("--collapsed"):
+                profiler.writeCollapsed(handler.get("--collapsed"))
+        if handler.has("--stats"):
+            print(stats.report("json" if handler.get("--stats") == "json" else "text"), file=stderr)
 
 initServo()
\ No newline at end of file
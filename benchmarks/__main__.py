@@ -0,0 +1,42 @@
+from sys import argv, exit as sysexit
+
+from ..internal.private.handler import Handler
+from .suite import compare, load, run, save, verify
+
+
+def formatValue(metric: str, value: float) -> str:
+    if metric == "peak_memory":
+        return f"{value / 1024:.1f} KiB"
+    return f"{value * 1000:.2f} ms"
+
+def main() -> None:
+    handler: Handler = Handler(argv[1:])
+    match handler.get(0):
+        case "run":
+            results = run(int(handler.get("-n", 5)), handler.get("-b").split(",") if handler.get("-b") else None, handler.has("-O"))
+            print(f"{'benchmark':<12} {'parse':>12} {'execute':>12} {'peak memory':>14}")
+            for name, result in results["benchmarks"].items():
+                print(f"{name:<12} {formatValue('parse', result['parse']):>12} {formatValue('execute', result['execute']):>12} {formatValue('peak_memory', result['peak_memory']):>14}")
+            if handler.get("-o"):
+                save(results, handler.get("-o"))
+        case "compare":
+            rows = compare(load(handler.get(1)), load(handler.get(2)), float(handler.get("-t", 0.1)))
+            print(f"{'benchmark':<12} {'metric':<12} {'baseline':>12} {'current':>12} {'change':>9}")
+            for name, metric, old, new, regressed in rows:
+                change: float = (new / old - 1) * 100 if old else 0.0
+                print(f"{name:<12} {metric:<12} {formatValue(metric, old):>12} {formatValue(metric, new):>12} {change:>+8.1f}%" + ("  REGRESSION" if regressed else ""))
+            if any(row[4] for row in rows):
+                sysexit(1)
+        case "verify":
+            rows = verify(handler.get("-b").split(",") if handler.get("-b") else None)
+            for name, matches, detail in rows:
+                print(f"{name:<12} {'ok' if matches else 'MISMATCH':<9} {detail}")
+            if not all(row[1] for row in rows):
+                sysexit(1)
+        case _:
+            print("usage: benchmarks run [-n repeats] [-b name,...] [-o results.json] [-O]")
+            print("       benchmarks compare baseline.json current.json [-t threshold]")
+            print("       benchmarks verify [-b name,...]")
+            sysexit(2)
+
+main()
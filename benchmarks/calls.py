@@ -0,0 +1,31 @@
+from time import perf_counter
+
+from ..internal.private.parser import Parser
+from ..internal.public.file import File
+
+
+def source(padding: int) -> str:
+    # the body grows by `padding` comment lines, the work done per call does not
+    lines: list[str] = ["fn bench(n) {"]
+    lines += [f"    # padding line {i} to make the body longer" for i in range(padding)]
+    lines += ["    return n", "}", ""]
+    return "\n".join(lines)
+
+def measure(padding: int, calls: int) -> float:
+    file: File = File("<benchmark>", no_read=True)
+    file.content = source(padding)
+    parser: Parser = Parser(file)
+    parser.parse().execute()
+    bench = parser.findValue("bench")
+    start: float = perf_counter()
+    for i in range(calls):
+        bench(i)
+    return (perf_counter() - start) / calls
+
+def main() -> None:
+    print(f"{'body lines':>12} {'per call (us)':>15}")
+    for padding in (0, 10, 100, 1000, 10000):
+        print(f"{padding + 3:>12} {measure(padding, 2000) * 1e6:>15.2f}")
+
+if __name__ == "__main__":
+    main()
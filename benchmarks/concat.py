@@ -0,0 +1,25 @@
+from time import perf_counter
+
+from ..internal.private.parser import Parser
+from ..internal.public.file import File
+
+
+def build(pieces: int, piece: str) -> tuple[float, float, int]:
+    # the report-building loop as a script writes it, s = s + piece
+    parser: Parser = Parser(File("<concat>", no_read=True))
+    parser.parseSource(f'text = ""\nfor i in range({pieces}) {{\n    text = text + "{piece}"\n}}\n')
+    start: float = perf_counter()
+    parser.execute()
+    built: float = perf_counter()
+    length: int = len(parser.findValue("text"))
+    return built - start, perf_counter() - built, length
+
+def main() -> None:
+    # 100k pieces of 10 characters is the 1 MB report
+    print(f"{'pieces':>8} {'size':>10} {'build (ms)':>11} {'flatten (ms)':>13} {'ns per +':>9}")
+    for pieces in (12500, 25000, 50000, 100000):
+        building, flattening, length = build(pieces, "0123456789")
+        print(f"{pieces:>8} {length:>10} {building * 1000:>11.2f} {flattening * 1000:>13.2f} {building / pieces * 1e9:>9.0f}")
+
+if __name__ == "__main__":
+    main()
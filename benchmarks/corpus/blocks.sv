@@ -0,0 +1,65 @@
+# block arguments passed through WAIT_BLOCK
+fn repeat(n, {body}) {
+    body(n)
+    return 0 if n == 0 else repeat(n - 1, body)
+}
+repeat(60) {
+    square = 0 * 0
+}
+repeat(60) {
+    square = 1 * 1
+}
+repeat(60) {
+    square = 2 * 2
+}
+repeat(60) {
+    square = 3 * 3
+}
+repeat(60) {
+    square = 4 * 4
+}
+repeat(60) {
+    square = 5 * 5
+}
+repeat(60) {
+    square = 6 * 6
+}
+repeat(60) {
+    square = 7 * 7
+}
+repeat(60) {
+    square = 8 * 8
+}
+repeat(60) {
+    square = 9 * 9
+}
+repeat(60) {
+    square = 10 * 10
+}
+repeat(60) {
+    square = 11 * 11
+}
+repeat(60) {
+    square = 12 * 12
+}
+repeat(60) {
+    square = 13 * 13
+}
+repeat(60) {
+    square = 14 * 14
+}
+repeat(60) {
+    square = 15 * 15
+}
+repeat(60) {
+    square = 16 * 16
+}
+repeat(60) {
+    square = 17 * 17
+}
+repeat(60) {
+    square = 18 * 18
+}
+repeat(60) {
+    square = 19 * 19
+}
@@ -0,0 +1,5 @@
+# nested and diamond-shaped imports
+<import bench_left>
+<import bench_right>
+<import bench_base>
+total = bench_left.left(10) + bench_right.right(10) + bench_base.scale(1)
@@ -0,0 +1,29 @@
+# while, for, break and continue running iteratively in one frame
+i = 0
+evens = 0
+while i < 20000 {
+    i = i + 1
+    if i % 2 == 1 {
+        continue
+    }
+    evens = evens + 1
+}
+total = 0
+for k in range(20000) {
+    if k > 15000 {
+        break
+    }
+    total = total + k
+}
+fn collatz(n) {
+    steps = 0
+    while n != 1 {
+        n = n // 2 if n % 2 == 0 else 3 * n + 1
+        steps = steps + 1
+    }
+    return steps
+}
+longest = 0
+for start in range(1, 200) {
+    longest = max(longest, collatz(start))
+}
@@ -0,0 +1,4 @@
+factor = 3
+fn scale(x) {
+    return x * factor
+}
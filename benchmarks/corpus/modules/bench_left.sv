@@ -0,0 +1,4 @@
+<import bench_base>
+fn left(x) {
+    return bench_base.scale(x) + 1
+}
@@ -0,0 +1,26 @@
+# constant expressions, dead code and one-line helpers for the -O pass
+fn square(x) {
+    return x * x
+}
+fn add(a, b) {
+    return a + b
+}
+fn size(n) {
+    return "big" if n > 10 else "small"
+}
+fn norm(x, y) {
+    return system_math.sqrt(add(square(x), square(y)))
+    system("echo unreachable")
+}
+limit = 60 * 60 * 24
+label = "servo" + "-" + "opt"
+total = 0
+fn step(i) {
+    return add(total, square(i) + norm(i, i + 1)) if i > 0 else 0
+}
+fn walk(n) {
+    step(n)
+    return 0 if n == 0 else walk(n - 1)
+}
+walk(200)
+kind = size(square(4))
@@ -0,0 +1,9 @@
+# deep and wide recursion through defineFunction
+fn down(n) {
+    return 0 if n == 0 else down(n - 1) + 1
+}
+fn fib(n) {
+    return n if n < 2 else fib(n - 1) + fib(n - 2)
+}
+deep = down(120)
+wide = fib(17)
@@ -0,0 +1,10 @@
+# heavy String concatenation
+fn build(n, acc) {
+    return acc if n == 0 else build(n - 1, acc + "line " + str(n) + " of the report" + "\n")
+}
+parts = [build(100, "") for i in range(40)]
+report = ""
+fn join(items, acc) {
+    return acc if not items else join(items[1:], acc + items[0])
+}
+report = join(parts, report)
@@ -0,0 +1,147 @@
+import json
+import os
+import platform
+import tracemalloc
+from contextlib import redirect_stdout
+from io import StringIO
+from statistics import median
+from time import perf_counter, time
+from typing import Any
+
+from ..internal.private.codecache import code_cache
+from ..internal.private.diskcache import disk_cache
+from ..internal.private.modules import module_registry
+from ..internal.private.optimizer import optimizer
+from ..internal.private.parser import Parser
+from ..internal.public.file import File
+from ..internal.public.string import flatten
+
+CORPUS_PATH: str = os.path.join(os.path.dirname(__file__), "corpus")
+
+
+def generateLongSource(statements: int) -> str:
+    # a long generated file, mostly definitions and assignments like the ones our generators emit
+    lines: list[str] = []
+    for i in range(statements):
+        lines.append(f"value_{i} = {i} * 2 + 1 # generated value {i}")
+        if i % 10 == 0:
+            lines += [f"fn helper_{i}(a, b) {{", f"    total = a + b + {i}", "    return total", "}"]
+    return "\n".join(lines) + "\n"
+
+def loadCorpus() -> dict[str, str]:
+    sources: dict[str, str] = {}
+    for name in sorted(os.listdir(CORPUS_PATH)):
+        if name.endswith(".sv"):
+            with open(os.path.join(CORPUS_PATH, name)) as f:
+                sources[name.removesuffix(".sv")] = f.read()
+    sources["long"] = generateLongSource(5000)
+    return sources
+
+def createParser(name: str, source: str) -> Parser:
+    # every run starts cold, as a fresh process would
+    module_registry.clear()
+    code_cache.clear()
+    file: File = File(os.path.join(CORPUS_PATH, f"{name}.sv"), no_read=True)
+    file.content = source
+    return Parser(file)
+
+def runOnce(name: str, source: str) -> tuple[float, float]:
+    parser: Parser = createParser(name, source)
+    start: float = perf_counter()
+    parser.parseSource(source)
+    parsed: float = perf_counter()
+    with redirect_stdout(StringIO()):
+        parser.execute()
+    return parsed - start, perf_counter() - parsed
+
+def runObserved(name: str, source: str, optimize: bool) -> tuple[str, dict[str, str]]:
+    # what a script printed and the plain values it left behind, functions and modules aside
+    optimizer.enabled = optimize
+    try:
+        parser: Parser = createParser(name, source)
+        output: StringIO = StringIO()
+        with redirect_stdout(output):
+            parser.parseSource(source)
+            parser.execute()
+    finally:
+        optimizer.enabled = False
+    # the type takes part too, a fold that turns a String into a plain str would otherwise print the same
+    values: dict[str, str] = {variable_name: describe(flatten(variable.value)) for variable_name, variable in dict.items(parser.pool) if not callable(variable.value) and variable.value_type != "module"}
+    return output.getvalue(), values
+
+def describe(value: Any) -> str:
+    return f"{type(value).__name__} {value!r}"
+
+def verify(names: list[str] | None = None) -> list[tuple[str, bool, str]]:
+    # the -O pass has to be invisible: same output and same globals as the plain run
+    disk_cache.enabled = False
+    module_registry.setSearchPath([os.path.join(CORPUS_PATH, "modules")])
+    rows: list[tuple[str, bool, str]] = []
+    for name, source in loadCorpus().items():
+        if names and name not in names:
+            continue
+        plain, optimized = runObserved(name, source, False), runObserved(name, source, True)
+        if plain[0] != optimized[0]:
+            rows.append((name, False, "output differs"))
+        elif plain[1] != optimized[1]:
+            differing: list[str] = sorted(key for key in plain[1].keys() | optimized[1].keys() if plain[1].get(key) != optimized[1].get(key))
+            rows.append((name, False, f"values differ: {', '.join(differing)}"))
+        else:
+            rows.append((name, True, f"{len(plain[1])} values match"))
+    return rows
+
+def measure(name: str, source: str, repeats: int) -> dict[str, Any]:
+    timings: list[tuple[float, float]] = [runOnce(name, source) for _ in range(repeats)]
+    # memory is traced in a separate run so tracemalloc does not skew the timings
+    tracemalloc.start()
+    runOnce(name, source)
+    peak_memory: int = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "parse": median(timing[0] for timing in timings),
+        "execute": median(timing[1] for timing in timings),
+        "peak_memory": peak_memory,
+        "repeats": repeats
+    }
+
+def run(repeats: int = 5, names: list[str] | None = None, optimize: bool = False) -> dict[str, Any]:
+    # imported modules are parsed on every run instead of coming from __servocache__
+    disk_cache.enabled = False
+    module_registry.setSearchPath([os.path.join(CORPUS_PATH, "modules")])
+    optimizer.enabled = optimize
+    results: dict[str, Any] = {}
+    try:
+        for name, source in loadCorpus().items():
+            if not names or name in names:
+                results[name] = measure(name, source, repeats)
+    finally:
+        optimizer.enabled = False
+    return {
+        "meta": {
+            "optimize": optimize,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "time": time()
+        },
+        "benchmarks": results
+    }
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> list[tuple[str, str, float, float, bool]]:
+    rows: list[tuple[str, str, float, float, bool]] = []
+    for name, old in baseline["benchmarks"].items():
+        new: dict[str, Any] | None = current["benchmarks"].get(name)
+        if new is None:
+            continue
+        for metric in ("parse", "execute", "peak_memory"):
+            regressed: bool = old[metric] > 0 and new[metric] / old[metric] > 1 + threshold
+            rows.append((name, metric, old[metric], new[metric], regressed))
+    return rows
+
+def load(path: str) -> dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+def save(results: dict[str, Any], path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
@@ -0,0 +1,67 @@
+import json
+import os
+import signal
+import socket
+import stat
+import struct
+import sys
+
+
+def getPrivateDirectory() -> str:
+    # a shared /tmp only ever holds the socket inside a directory nobody else can enter
+    return os.path.join("/tmp", f"servo-{os.getuid()}")
+
+def getSocketPath() -> str:
+    if os.environ.get("SERVO_SOCKET"):
+        return os.environ["SERVO_SOCKET"]
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return os.path.join(os.environ["XDG_RUNTIME_DIR"], f"servo-{os.getuid()}.sock")
+    return os.path.join(getPrivateDirectory(), "servo.sock")
+
+def ensurePrivateDirectory(directory: str) -> None:
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    info: os.stat_result = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"'{directory}' is not a private directory owned by this user")
+
+def getPeerUid(connection: socket.socket) -> int | None:
+    # None where the platform has no SO_PEERCRED, the private directory is all that protects the socket there
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    credentials: bytes = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    return struct.unpack("3i", credentials)[1]
+
+def main() -> int:
+    # deliberately imports nothing from the interpreter, the warm daemon does the work
+    args: list[str] = sys.argv[1:]
+    path: str = getSocketPath()
+    if args[:1] == ["--socket"]:
+        path, args = args[1], args[2:]
+    connection: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(path)
+    except OSError as error:
+        print(f"servo client: no daemon listening on {path} ({error.strerror}), start one with 'servo --daemon'", file=sys.stderr)
+        return 2
+    uid: int | None = getPeerUid(connection)
+    if uid is not None and uid != os.getuid():
+        print(f"servo client: {path} is served by uid {uid}, not by this user, refusing to hand it our terminal", file=sys.stderr)
+        return 2
+    # the script writes straight to our stdin, stdout and stderr, only the exit status comes back here
+    socket.send_fds(connection, [json.dumps({"argv": args, "cwd": os.getcwd()}).encode()], [0, 1, 2])
+    reader = connection.makefile("r")
+    pid: int = int(reader.readline() or 0)
+    try:
+        status: str = reader.readline()
+    except KeyboardInterrupt:
+        if pid:
+            os.kill(pid, signal.SIGINT)
+        status = reader.readline()
+    return int(status) if status.strip() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from tempfile import TemporaryFile
+from time import perf_counter
+from typing import Any, Callable
+
+from .daemon import preloadModules
+
+# the batch being run, inherited by the forked workers instead of pickled
+active: "Batch | None" = None
+
+
+def runScript(script: str) -> dict[str, Any]:
+    return active.runScript(script)
+
+
+class Batch:
+    def __init__(self, run: Callable[[], None], directory: str, jobs: int, options: list[str]) -> None:
+        self.run: Callable[[], None] = run
+        self.directory: str = directory
+        self.jobs: int = jobs
+        # the other command line options, applied to every script
+        self.options: list[str] = options
+
+    def findScripts(self) -> list[str]:
+        scripts: list[str] = []
+        for root, directories, files in os.walk(self.directory):
+            directories[:] = sorted(directory for directory in directories if directory != "__servocache__")
+            scripts += [os.path.join(root, name) for name in sorted(files) if name.endswith(".sv")]
+        return scripts
+
+    def runScript(self, script: str) -> dict[str, Any]:
+        # runs inside a worker, whose module registry keeps every import for the scripts after this one
+        sys.argv[:] = ["servo", script, *self.options]
+        with TemporaryFile("w+") as output:
+            # descriptor level, so commands started by the script are captured as well
+            sys.stdout.flush()
+            sys.stderr.flush()
+            saved: list[int] = [os.dup(1), os.dup(2)]
+            os.dup2(output.fileno(), 1)
+            os.dup2(output.fileno(), 2)
+            started: float = perf_counter()
+            try:
+                self.run()
+                code: int = 0
+            except SystemExit as error:
+                code = error.code if isinstance(error.code, int) else (0 if error.code is None else 1)
+            except BaseException as error:
+                print(f"{type(error).__name__}: {error}")
+                code = 1
+            finally:
+                seconds: float = perf_counter() - started
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os.dup2(saved[0], 1)
+                os.dup2(saved[1], 2)
+                for fd in saved:
+                    os.close(fd)
+            output.seek(0)
+            return {"script": script, "exit_code": code, "seconds": seconds, "output": output.read()}
+
+    def execute(self, preload: list[str]) -> list[dict[str, Any]]:
+        global active
+        active = self
+        preloadModules(preload)
+        scripts: list[str] = self.findScripts()
+        with ProcessPoolExecutor(max(1, min(self.jobs, len(scripts) or 1)), mp_context=get_context("fork")) as executor:
+            return list(executor.map(runScript, scripts))
+
+    def summarize(self, results: list[dict[str, Any]], seconds: float) -> str:
+        failed: list[dict[str, Any]] = [result for result in results if result["exit_code"] != 0]
+        lines: list[str] = []
+        for result in failed:
+            lines += [f"--- {result['script']} (exit {result['exit_code']})", result["output"].rstrip()]
+        lines.append(f"{len(results) - len(failed)} passed, {len(failed)} failed, {len(results)} scripts in {seconds:.2f}s with {self.jobs} jobs")
+        for result in sorted(results, key=lambda result: -result["seconds"])[:5]:
+            lines.append(f"{result['seconds'] * 1000:>10.1f} ms  {result['script']}")
+        return "\n".join(lines)
+
+    def writeReport(self, results: list[dict[str, Any]], seconds: float, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump({
+                "directory": os.path.abspath(self.directory),
+                "jobs": self.jobs,
+                "seconds": seconds,
+                "passed": sum(1 for result in results if result["exit_code"] == 0),
+                "failed": sum(1 for result in results if result["exit_code"] != 0),
+                "scripts": results
+            }, f, indent=2)
@@ -0,0 +1,182 @@
+import os
+import signal
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Callable, Iterator
+
+# steps between two checks of the clock and memory, and the most a step budget can be overshot by
+CHECK_INTERVAL: int = 1000
+# countdown used while no budget is active, never reached in practice
+UNLIMITED: int = 1 << 62
+# memory can grow a lot within a few steps, while a memory budget is active it is also sampled this often
+MEMORY_SAMPLE_SECONDS: float = 0.01
+
+
+class BudgetExceededError(Exception):
+    pass
+
+
+class Limits:
+    def __init__(self, name: str, steps: int | None = None, seconds: float | None = None, subprocess_seconds: float | None = None, memory: int | None = None) -> None:
+        self.name: str = name
+        self.steps: int | None = steps
+        self.seconds: float | None = seconds
+        self.subprocess_seconds: float | None = subprocess_seconds
+        # bytes of growth over what the process used when the budget started
+        self.memory: int | None = memory
+        self.steps_used: int = 0
+        self.subprocess_used: float = 0.0
+        self.started: float = 0.0
+        self.memory_base: int = 0
+
+    def getDeadline(self) -> float | None:
+        return None if self.seconds is None else self.started + self.seconds
+
+    def getSubprocessRemaining(self) -> float | None:
+        return None if self.subprocess_seconds is None else self.subprocess_seconds - self.subprocess_used
+
+
+class Budgets:
+    def __init__(self) -> None:
+        # innermost last, a step or second spent counts against every budget around it
+        self.stack: list[Limits] = []
+        self.countdown: int = UNLIMITED
+        self.window: int = UNLIMITED
+        self.lock: threading.Lock = threading.Lock()
+        self.previous_handler: Any = None
+
+    def getMemory(self) -> int:
+        # resident set size where /proc has it, python allocations through tracemalloc otherwise
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            return tracemalloc.get_traced_memory()[0]
+
+    def enter(self, limits: Limits) -> None:
+        self.flush()
+        limits.started = perf_counter()
+        if limits.memory is not None:
+            limits.memory_base = self.getMemory()
+        self.stack.append(limits)
+        self.reset()
+
+    def leave(self) -> None:
+        self.flush()
+        self.stack.pop()
+        self.reset()
+
+    @contextmanager
+    def limit(self, limits: Limits | None) -> Iterator[None]:
+        if limits is None:
+            yield
+            return
+        self.enter(limits)
+        try:
+            yield
+        finally:
+            self.leave()
+
+    def flush(self) -> None:
+        # hands the steps counted down since the last check to every active budget
+        used: int = self.window - self.countdown
+        if used and self.stack:
+            for limits in self.stack:
+                limits.steps_used += used
+        self.countdown = self.window
+
+    def reset(self) -> None:
+        window: int = UNLIMITED if not self.stack else CHECK_INTERVAL
+        for limits in self.stack:
+            if limits.steps is not None:
+                window = min(window, max(1, limits.steps - limits.steps_used + 1))
+        self.window = self.countdown = window
+        self.arm()
+
+    def checkpoint(self) -> None:
+        # called by the frame loop once the countdown runs out
+        self.flush()
+        try:
+            self.check()
+        finally:
+            self.reset()
+
+    def check(self) -> None:
+        now: float = perf_counter()
+        memory: int | None = None
+        for limits in self.stack:
+            if limits.steps is not None and limits.steps_used > limits.steps:
+                raise BudgetExceededError(f"step budget of {limits.steps} exceeded in '{limits.name}'")
+            if limits.seconds is not None and now - limits.started > limits.seconds:
+                raise BudgetExceededError(f"time budget of {limits.seconds:g}s exceeded in '{limits.name}'")
+            if limits.subprocess_seconds is not None and limits.subprocess_used > limits.subprocess_seconds:
+                raise BudgetExceededError(f"subprocess time budget of {limits.subprocess_seconds:g}s exceeded in '{limits.name}'")
+            if limits.memory is not None:
+                memory = self.getMemory() if memory is None else memory
+                if memory - limits.memory_base > limits.memory:
+                    raise BudgetExceededError(f"memory budget of {limits.memory // (1 << 20)} MiB exceeded in '{limits.name}' (grew by {(memory - limits.memory_base) // (1 << 20)} MiB)")
+
+    def arm(self) -> None:
+        # a single python call (an eval, a blocking builtin) never reaches a checkpoint, an alarm interrupts it instead
+        if not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+            return
+        now: float = perf_counter()
+        deadlines: list[float] = [deadline for deadline in (limits.getDeadline() for limits in self.stack) if deadline is not None]
+        if any(limits.memory is not None for limits in self.stack):
+            deadlines.append(now + MEMORY_SAMPLE_SECONDS)
+        if not deadlines:
+            if self.previous_handler is not None:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, self.previous_handler)
+                self.previous_handler = None
+            return
+        if self.previous_handler is None:
+            self.previous_handler = signal.signal(signal.SIGALRM, self.expire)
+        signal.setitimer(signal.ITIMER_REAL, max(min(deadlines) - now, 0.001))
+
+    def expire(self, signum: int, frame: Any) -> None:
+        self.check()
+        # woke up a little early, try again at the deadline
+        self.arm()
+
+    def isActive(self) -> bool:
+        return bool(self.stack)
+
+    def getSubprocessTimeout(self) -> float | None:
+        remaining: list[float] = [value for value in (limits.getSubprocessRemaining() for limits in self.stack) if value is not None]
+        return max(min(remaining), 0.0) if remaining else None
+
+    def chargeSubprocess(self, seconds: float) -> None:
+        # commands run on pool threads, their time is added under a lock
+        with self.lock:
+            for limits in self.stack:
+                limits.subprocess_used += seconds
+            for limits in self.stack:
+                if limits.subprocess_seconds is not None and limits.subprocess_used > limits.subprocess_seconds:
+                    raise BudgetExceededError(f"subprocess time budget of {limits.subprocess_seconds:g}s exceeded in '{limits.name}'")
+
+
+class Budgeted:
+    def __init__(self, function: Callable, steps: int | None = None, seconds: float | None = None, memory: int | None = None, subprocess_seconds: float | None = None) -> None:
+        self.function: Callable = function
+        self.steps: int | None = steps
+        self.seconds: float | None = seconds
+        self.memory: int | None = memory
+        self.subprocess_seconds: float | None = subprocess_seconds
+        self.name: str = getattr(function, "qualified_name", getattr(function, "__name__", "<function>"))
+        self.block_arg_index: int = getattr(function, "block_arg_index", -1)
+
+    def __call__(self, *call_args: Any) -> Any:
+        # every call starts with the full budget
+        with budgets.limit(Limits(self.name, self.steps, self.seconds, self.subprocess_seconds, self.memory)):
+            return self.function(*call_args)
+
+    def __repr__(self) -> str:
+        return f"<budgeted {self.name}>"
+
+
+budgets: Budgets = Budgets()
@@ -1,33 +1,137 @@
-from subprocess import run as system, CalledProcessError
-from typing import Callable
+from itertools import repeat
+from mmap import mmap
+from subprocess import run as system, CalledProcessError, TimeoutExpired
+from time import perf_counter
+from typing import Any, Iterator
 
-from ..public.safe import safe
+from ..public.function import getArgs
+from ..public.memo import Memo
+from ..public.process import Process
+from ..public.string import String
+from ..public.vector import Vector
+from .budgets import BudgetExceededError, Budgeted, budgets
+from .files import file_table
+from .processes import process_pool
+from .stats import stats
+from .workers import worker_pool
 
 
 class Builtins:
     @staticmethod
-    @safe
     def system(args: str) -> None:
-        """servo.internal.private.builtins"""
-        try:
-            result: str = system(args, shell=True, capture_output=True, text=True, check=True)
-            print(result.stdout)
-        except CalledProcessError as err:
-            raise ValueError(err.stderr)
+        process_pool.execute(str(args))
+        # the blank line print(result.stdout) used to leave behind
+        print()
     @staticmethod
-    @safe
     def systemreturn(args: str) -> str:
-        """servo.internal.private.builtins"""
+        stats.spawns += 1
+        timeout = budgets.getSubprocessTimeout()
+        started = perf_counter()
         try:
-            result: str = system(args, shell=True, capture_output=True, text=True, check=True)
+            result: str = system(str(args), shell=True, capture_output=True, text=True, check=True, timeout=timeout)
             return result.stdout
         except CalledProcessError as err:
             raise ValueError(err.stderr)
+        except TimeoutExpired:
+            raise BudgetExceededError(f"command '{args}' stopped after using up the subprocess time budget of {timeout:g}s")
+        finally:
+            budgets.chargeSubprocess(perf_counter() - started)
+    @staticmethod
+    def spawn(args: str) -> Process:
+        return process_pool.spawn(str(args))
+    @staticmethod
+    def wait(args: Process) -> int:
+        if not isinstance(args, Process):
+            raise TypeError(f"wait() expects a process handle from spawn(), got '{args}'")
+        return process_pool.wait(args)
+    @staticmethod
+    def waitall(args: Any = "") -> list[int]:
+        if isinstance(args, Process):
+            return process_pool.waitAll([args])
+        if isinstance(args, (tuple, list)):
+            return process_pool.waitAll(list(args))
+        return process_pool.waitAll()
+    @staticmethod
+    def parallel(*args: Any) -> list:
+        functions = list(args[0]) if len(args) == 1 and isinstance(args[0], list) else list(getArgs(args))
+        for function in functions:
+            if not callable(function):
+                raise TypeError(f"parallel() expects functions or blocks, got '{function}'")
+        return worker_pool.parallel(functions)
+    @staticmethod
+    def parallelmap(*args: Any) -> list:
+        args = getArgs(args)
+        if len(args) != 2 or not callable(args[0]):
+            raise TypeError(f"parallelmap() expects a function and a list of inputs, got '{args}'")
+        return worker_pool.map(args[0], list(args[1]))
+    @staticmethod
+    def memo(*args: Any) -> Memo:
+        # memo(f), memo(f, maxsize) or memo(f, maxsize, ttl in seconds)
+        args = getArgs(args)
+        if not args or not callable(args[0]) or len(args) > 3:
+            raise TypeError(f"memo() expects a function, an optional maxsize and an optional ttl, got '{args}'")
+        maxsize = int(args[1]) if len(args) > 1 and args[1] is not None else 128
+        if maxsize < 1:
+            raise ValueError(f"memo() maxsize must be at least 1, got {maxsize}")
+        return Memo(args[0], maxsize, float(args[2]) if len(args) > 2 and args[2] is not None else None)
+    @staticmethod
+    def budget(*args: Any) -> Budgeted:
+        # budget(f, steps, seconds, memory in MiB, subprocess seconds), none to leave one unlimited
+        args = getArgs(args)
+        if not args or not callable(args[0]) or len(args) > 5:
+            raise TypeError(f"budget() expects a function, then steps, seconds, memory in MiB and subprocess seconds, got '{args}'")
+        limits = [*args[1:], *[None] * (5 - len(args))]
+        return Budgeted(
+            args[0],
+            int(limits[0]) if limits[0] is not None else None,
+            float(limits[1]) if limits[1] is not None else None,
+            int(float(limits[2]) * (1 << 20)) if limits[2] is not None else None,
+            float(limits[3]) if limits[3] is not None else None
+        )
     @staticmethod
-    @safe
-    def if_(condition: bool, true: Callable) -> None:
-        """servo.internal.private.builtins"""
+    def readfile(path: str) -> String:
+        return String(file_table.get(path).read())
+    @staticmethod
+    def readlines(path: str) -> Iterator[String]:
+        return (String(line) for line in file_table.get(path).readLines())
+    @staticmethod
+    def mapfile(path: str) -> mmap | bytes:
+        return file_table.get(path).map()
+    @staticmethod
+    def writefile(*args: Any) -> None:
+        args = getArgs(args)
+        if len(args) != 2:
+            raise TypeError(f"writefile() expects a path and the content, got '{args}'")
+        file_table.get(args[0]).write(str(args[1]))
+    @staticmethod
+    def appendfile(*args: Any) -> None:
+        args = getArgs(args)
+        if len(args) != 2:
+            raise TypeError(f"appendfile() expects a path and the content, got '{args}'")
+        file_table.get(args[0]).append(str(args[1]))
+    @staticmethod
+    def vector(*args: Any) -> Vector:
+        # vector([1, 2, 3]), vector(length) of zeros, or vector("1, 2, 3") parsed from text
+        args = getArgs(args)
+        values = args[0] if len(args) == 1 else args
+        if isinstance(values, str):
+            return Vector.fromText(str(values))
+        if isinstance(values, int):
+            return Vector(repeat(0.0, values))
+        return Vector(values)
+    @staticmethod
+    def loadvector(path: str) -> Vector:
+        return Vector.fromLines(file_table.get(path).readLines())
+    @staticmethod
+    def if_(*args: Any) -> Any:
+        # if_(condition, then) or if_(condition, then, otherwise), the branches are called without arguments
+        condition, true, *rest = getArgs(args)
         if condition:
-            true()
-        else:
-            false()
\ No newline at end of file
+            return true()
+        if rest and rest[0] is not None:
+            return rest[0]()
+
+
+# parallel() { ... } runs its trailing block alongside the functions it was given
+Builtins.parallel.block_arg_index = 0
+Builtins.if_.block_arg_index = 1
@@ -0,0 +1,54 @@
+import threading
+from collections import OrderedDict
+from types import CodeType
+from typing import Callable
+
+
+class CodeCache:
+    def __init__(self, maxsize: int = 4096) -> None:
+        self.maxsize: int = maxsize
+        self.entries: OrderedDict[str, CodeType] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        # worker threads evaluate through the same cache, an eviction must not run between a lookup and its move_to_end
+        self.lock: threading.Lock = threading.Lock()
+
+    def get(self, expression: str, prepare: Callable[[str], str]) -> CodeType:
+        with self.lock:
+            code: CodeType | None = self.entries.get(expression)
+            if code is not None:
+                self.hits += 1
+                self.entries.move_to_end(expression)
+                return code
+            self.misses += 1
+        # compiled outside the lock, two threads missing on the same text both compile it once
+        code = compile(prepare(expression), "<servo>", "eval")
+        self.put(expression, code)
+        return code
+
+    def put(self, expression: str, code: CodeType) -> None:
+        with self.lock:
+            self.entries[expression] = code
+            self.entries.move_to_end(expression)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def getStats(self) -> dict[str, int]:
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+# shared by every Parser in the process, keyed by the expression text before wrap_strings
+code_cache: CodeCache = CodeCache()
@@ -0,0 +1,113 @@
+import json
+import os
+import signal
+import socket
+import sys
+import traceback
+from typing import Callable
+
+from ...client import ensurePrivateDirectory, getPeerUid, getPrivateDirectory, getSocketPath
+from ..public.file import File
+from ..public.instruction import Instruction
+from .modules import module_registry
+from .parser import Parser
+
+
+def preloadModules(names: list[str]) -> dict[str, float]:
+    # runs the imports in a throwaway parser, returns the modification time of every loaded file
+    parser: Parser = Parser(File("<preload>", no_read=True))
+    for name in names:
+        parser.runImport(Instruction("IMPORT", 0, module=name))
+    return {path: os.path.getmtime(path) for path in module_registry.modules}
+
+
+class Daemon:
+    def __init__(self, run: Callable[[], None], socket_path: str | None = None) -> None:
+        self.run: Callable[[], None] = run
+        self.socket_path: str = socket_path or getSocketPath()
+        self.preloaded: dict[str, float] = {}
+
+    def preload(self, names: list[str]) -> None:
+        # loaded once here, every forked run starts with them already executed
+        self.preloaded = preloadModules(names)
+
+    def serve(self) -> None:
+        # forked runs are reaped by the kernel, each one reports its own exit status
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        if os.path.dirname(self.socket_path) == getPrivateDirectory():
+            ensurePrivateDirectory(getPrivateDirectory())
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # created owner-only, there is no moment where another user could connect before a chmod
+        umask: int = os.umask(0o177)
+        try:
+            server.bind(self.socket_path)
+        finally:
+            os.umask(umask)
+        server.listen(64)
+        print(f"servo daemon listening on {self.socket_path}", file=sys.stderr)
+        try:
+            while True:
+                connection, _ = server.accept()
+                self.accept(server, connection)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def accept(self, server: socket.socket, connection: socket.socket) -> None:
+        # a run gets the caller's terminal and our files, only the user who started the daemon may ask for one
+        uid: int | None = getPeerUid(connection)
+        if uid is not None and uid != os.getuid():
+            print(f"servo daemon: refused a connection from uid {uid}", file=sys.stderr)
+            connection.close()
+            return
+        try:
+            message, fds, _, _ = socket.recv_fds(connection, 1 << 16, 3)
+            request: dict = json.loads(message)
+        except (OSError, ValueError):
+            connection.close()
+            return
+        pid: int = os.fork()
+        if pid == 0:
+            server.close()
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            connection.sendall(f"{os.getpid()}\n".encode())
+            code: int = self.execute(request, fds)
+            try:
+                connection.sendall(f"{code}\n".encode())
+            finally:
+                os._exit(code)
+        for fd in fds:
+            os.close(fd)
+        connection.close()
+
+    def execute(self, request: dict, fds: list[int]) -> int:
+        # runs in the forked child: the client's stdio, directory and arguments, a clean set of globals
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        os.chdir(request["cwd"])
+        sys.argv[:] = ["servo", *request["argv"]]
+        # module names resolve against the client's directory, edited modules are loaded again
+        module_registry.locations.clear()
+        for path, modified in self.preloaded.items():
+            if not os.path.exists(path) or os.path.getmtime(path) != modified:
+                module_registry.remove(path)
+        try:
+            self.run()
+            return 0
+        except SystemExit as error:
+            return error.code if isinstance(error.code, int) else (0 if error.code is None else 1)
+        except KeyboardInterrupt:
+            return 130
+        except BaseException:
+            traceback.print_exc()
+            return 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
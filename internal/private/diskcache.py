@@ -0,0 +1,81 @@
+import hashlib
+import marshal
+import os
+import pickle
+import sys
+from typing import Callable
+
+from ..public.file import File
+from ..public.instruction import Instruction
+from .codecache import code_cache
+
+CACHE_VERSION: int = 6
+
+
+class DiskCache:
+    def __init__(self, directory: str | None = None, enabled: bool = True) -> None:
+        self.directory: str | None = directory if directory is not None else os.environ.get("SERVO_CACHE_DIR")
+        self.enabled: bool = enabled and not os.environ.get("SERVO_NO_CACHE")
+        # optimised and plain code are cached side by side, "" or "opt"
+        self.variant: str = ""
+
+    def getCachePath(self, file: File) -> str:
+        name: str = f"{file.getBaseName()}.{sys.implementation.cache_tag}{'.' + self.variant if self.variant else ''}.svc"
+        if self.directory:
+            # mirror the source tree so scripts with the same name in different places do not collide
+            return os.path.join(self.directory, file.getParent().lstrip("/\\"), name)
+        return os.path.join(file.getParent(), "__servocache__", name)
+
+    def getHash(self, file: File) -> str:
+        return hashlib.sha256(file.getContent().encode()).hexdigest()
+
+    def load(self, file: File) -> list[Instruction] | None:
+        if not self.enabled or file.getType() != "file":
+            return None
+        try:
+            with open(self.getCachePath(file), "rb") as f:
+                entry: dict = pickle.load(f)
+            if entry["version"] != CACHE_VERSION or entry["tag"] != sys.implementation.cache_tag or entry["hash"] != self.getHash(file):
+                return None
+            for expression, code in marshal.loads(entry["expressions"]).items():
+                code_cache.put(expression, code)
+            return entry["code"]
+        except Exception:
+            # missing, stale or corrupt entries fall back to a normal parse
+            return None
+
+    def store(self, file: File, code: list[Instruction], prepare: Callable[[str], str]) -> None:
+        if not self.enabled or file.getType() != "file":
+            return
+        expressions: dict = {}
+        self.collectExpressions(code, prepare, expressions)
+        path: str = self.getCachePath(file)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(f"{path}.{os.getpid()}.tmp", "wb") as f:
+                pickle.dump({
+                    "version": CACHE_VERSION,
+                    "tag": sys.implementation.cache_tag,
+                    "hash": self.getHash(file),
+                    "code": code,
+                    "expressions": marshal.dumps(expressions)
+                }, f)
+            os.replace(f"{path}.{os.getpid()}.tmp", path)
+        except OSError:
+            # like __pycache__, an unwritable location only means the next run parses again
+            pass
+
+    def collectExpressions(self, code: list[Instruction], prepare: Callable[[str], str], expressions: dict) -> None:
+        for instruction in code:
+            expression: str = instruction.data.get("expression") or instruction.data.get("arguments") or ""
+            if expression.strip():
+                try:
+                    expressions[expression] = code_cache.get(expression, prepare)
+                except SyntaxError:
+                    # left to run time, where a call falls back to passing the raw text
+                    pass
+            if "body" in instruction.data:
+                self.collectExpressions(instruction.data["body"], prepare, expressions)
+
+
+disk_cache: DiskCache = DiskCache()
@@ -0,0 +1,24 @@
+import os
+
+from ..public.file import File
+
+
+class FileTable:
+    def __init__(self) -> None:
+        # absolute path -> File, so every builtin call on a path shares its buffered writer
+        self.files: dict[str, File] = {}
+
+    def get(self, path: str) -> File:
+        absolute: str = os.path.abspath(str(path))
+        file: File | None = self.files.get(absolute)
+        if file is None:
+            file = self.files[absolute] = File(absolute, no_read=True)
+        return file
+
+    def closeAll(self) -> None:
+        for file in self.files.values():
+            file.close()
+        self.files.clear()
+
+
+file_table: FileTable = FileTable()
@@ -0,0 +1,31 @@
+import re
+
+from ..public.token import Token
+
+
+TOKEN_PATTERN: re.Pattern = re.compile(r"""
+      (?P<NEWLINE>\n)
+    | (?P<SPACE>[^\S\n]+)
+    | (?P<COMMENT>\#[^\n]*)
+    | (?P<MLCOMMENT>/\*(?:.*?\*/|.*))
+    | (?P<NAME>[^\W\d][\w.]*)
+    | (?P<NUMBER>\d+)
+    | (?P<STRING>"[^"\n]*"|'[^'\n]*')
+    | (?P<SYMBOL>.)
+""", re.VERBOSE | re.DOTALL)
+
+
+class Lexer:
+    def __init__(self, source: str) -> None:
+        self.source: str = source
+
+    def tokenize(self, end: int | None = None, partial: bool = False) -> list[Token]:
+        source: str = self.source
+        end = len(source) if end is None else end
+        tokens: list[Token] = [Token(match.lastgroup, match.start(), match.end(), source) for match in TOKEN_PATTERN.finditer(source, 0, end)]
+        if tokens and tokens[-1].type == "MLCOMMENT" and not source.endswith("*/", tokens[-1].start + 2, end):
+            if not partial:
+                raise SyntaxError("Unexpected end of file. Unterminated mode: MLCOMMENT")
+            # the rest of the comment has not been read yet
+            tokens.pop()
+        return tokens
@@ -0,0 +1,81 @@
+import os
+
+from ..public.instruction import Instruction
+from ..public.module import Module
+
+REACH_PATH: str = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "reach"))
+
+
+class ModuleRegistry:
+    def __init__(self) -> None:
+        self.modules: dict[str, Module] = {}
+        self.locations: dict[str, str] = {}
+        self.search_path: list[str] = ["", *[p for p in os.environ.get("SERVO_PATH", "").split(os.pathsep) if p], REACH_PATH]
+        # importing file -> files it imported, recorded as imports run
+        self.imports: dict[str, set[str]] = {}
+        # compiled code kept across runs by --watch until its file changes
+        self.retain: bool = False
+        self.compiled: dict[str, list[Instruction]] = {}
+
+    def setSearchPath(self, search_path: list[str]) -> None:
+        self.search_path = search_path
+        self.locations.clear()
+
+    def find(self, name: str) -> str:
+        path: str | None = self.locations.get(name)
+        if path is None:
+            for directory in self.search_path:
+                candidate: str = os.path.join(directory, f"{name}.sv")
+                if os.path.isfile(candidate):
+                    path = os.path.abspath(candidate)
+                    break
+            else:
+                raise ModuleNotFoundError(f"module '{name}' not found locally, in SERVO_PATH or in reach.")
+            self.locations[name] = path
+        return path
+
+    def get(self, path: str) -> Module | None:
+        return self.modules.get(path)
+
+    def add(self, module: Module) -> None:
+        self.modules[module.__file__] = module
+
+    def remove(self, path: str) -> None:
+        self.modules.pop(path, None)
+
+    def addImport(self, importer: str, path: str) -> None:
+        self.imports.setdefault(importer, set()).add(path)
+
+    def getCompiled(self, path: str) -> list[Instruction] | None:
+        return self.compiled.get(path)
+
+    def keepCompiled(self, path: str, code: list[Instruction]) -> None:
+        if self.retain:
+            self.compiled[path] = code
+
+    def invalidate(self, paths: set[str]) -> set[str]:
+        # changed files are compiled again, they and every file importing them run again
+        stale: set[str] = set(paths)
+        while True:
+            importers: set[str] = {importer for importer, imported in self.imports.items() if importer not in stale and imported & stale}
+            if not importers:
+                break
+            stale |= importers
+        for path in stale:
+            self.modules.pop(path, None)
+        for path in paths:
+            self.compiled.pop(path, None)
+            self.imports.pop(path, None)
+        # a new file may now shadow one found earlier on the search path
+        self.locations.clear()
+        return stale
+
+    def clear(self) -> None:
+        self.modules.clear()
+        self.locations.clear()
+        self.imports.clear()
+        self.compiled.clear()
+
+
+# process-wide, like sys.modules: every <import> of the same file shares one Module
+module_registry: ModuleRegistry = ModuleRegistry()
@@ -0,0 +1,250 @@
+import ast
+import operator
+from typing import Any, Callable
+
+from ..public.instruction import Instruction
+
+# operators folded at compile time, anything else is left for run time
+BINARY_OPERATORS: dict[type, Callable] = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod, ast.Pow: operator.pow,
+    ast.BitXor: operator.xor, ast.BitAnd: operator.and_, ast.BitOr: operator.or_,
+    ast.LShift: operator.lshift, ast.RShift: operator.rshift
+}
+UNARY_OPERATORS: dict[type, Callable] = {ast.USub: operator.neg, ast.UAdd: operator.pos, ast.Not: operator.not_, ast.Invert: operator.invert}
+COMPARE_OPERATORS: dict[type, Callable] = {
+    ast.Eq: operator.eq, ast.NotEq: operator.ne, ast.Lt: operator.lt, ast.LtE: operator.le,
+    ast.Gt: operator.gt, ast.GtE: operator.ge
+}
+# folded values are written back as source text, so they have to stay small and round-trip through repr
+MAX_CONSTANT_LENGTH: int = 256
+
+
+class Helper:
+    def __init__(self, name: str, args: list[str], expression: ast.expr) -> None:
+        self.name: str = name
+        self.args: list[str] = args
+        self.expression: ast.expr = expression
+        self.free: set[str] = {node.id for node in ast.walk(expression) if isinstance(node, ast.Name)} - set(args)
+
+
+class Folder(ast.NodeTransformer):
+    def __init__(self, helpers: dict[str, Helper], bound: set[str]) -> None:
+        self.helpers: dict[str, Helper] = helpers
+        self.bound: set[str] = bound
+        self.changed: bool = False
+        self.active: set[str] = set()
+
+    def constant(self, node: ast.AST, value: Any) -> ast.AST:
+        if type(value) not in (int, float, str, bool) or len(repr(value)) > MAX_CONSTANT_LENGTH:
+            return node
+        if type(value) is float and repr(value) in ("inf", "-inf", "nan"):
+            return node
+        if type(value) is str and ("'" in value or '"' in value or "\\" in value or not value.isprintable()):
+            # wrap_strings finds literals with a plain regex, escapes would confuse it
+            return node
+        self.changed = True
+        return ast.copy_location(ast.Constant(value), node)
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        self.generic_visit(node)
+        if isinstance(node.left, ast.Constant) and isinstance(node.right, ast.Constant) and type(node.op) in BINARY_OPERATORS:
+            left, right = node.left.value, node.right.value
+            if isinstance(node.op, (ast.Pow, ast.LShift)) and isinstance(right, int) and abs(right) > 64:
+                return node
+            if isinstance(node.op, ast.Mult) and (isinstance(left, str) or isinstance(right, str)):
+                if not isinstance(left, int) and not isinstance(right, int):
+                    return node
+                if len(left if isinstance(left, str) else right) * (right if isinstance(left, str) else left) > MAX_CONSTANT_LENGTH:
+                    return node
+            try:
+                return self.constant(node, BINARY_OPERATORS[type(node.op)](left, right))
+            except Exception:
+                # 1 / 0 and friends fail at run time like they always did
+                return node
+        return node
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.AST:
+        self.generic_visit(node)
+        if isinstance(node.operand, ast.Constant):
+            try:
+                return self.constant(node, UNARY_OPERATORS[type(node.op)](node.operand.value))
+            except Exception:
+                return node
+        return node
+
+    def visit_Compare(self, node: ast.Compare) -> ast.AST:
+        self.generic_visit(node)
+        values = [node.left, *node.comparators]
+        if all(isinstance(value, ast.Constant) for value in values) and all(type(op) in COMPARE_OPERATORS for op in node.ops):
+            try:
+                result = all(COMPARE_OPERATORS[type(op)](left.value, right.value) for op, left, right in zip(node.ops, values, values[1:]))
+            except Exception:
+                return node
+            return self.constant(node, result)
+        return node
+
+    def visit_BoolOp(self, node: ast.BoolOp) -> ast.AST:
+        self.generic_visit(node)
+        if all(isinstance(value, ast.Constant) for value in node.values):
+            result = node.values[0].value
+            for value in node.values[1:]:
+                if (isinstance(node.op, ast.And) and not result) or (isinstance(node.op, ast.Or) and result):
+                    break
+                result = value.value
+            return self.constant(node, result)
+        return node
+
+    def visit_IfExp(self, node: ast.IfExp) -> ast.AST:
+        self.generic_visit(node)
+        if isinstance(node.test, ast.Constant):
+            self.changed = True
+            return node.body if node.test.value else node.orelse
+        return node
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        self.generic_visit(node)
+        helper = self.helpers.get(node.func.id) if isinstance(node.func, ast.Name) else None
+        if helper is None or helper.name in self.active or node.keywords or len(node.args) != len(helper.args):
+            # helpers calling each other are expanded once, not forever
+            return node
+        if any(isinstance(arg, ast.Starred) for arg in node.args) or helper.free & self.bound:
+            # a local at the call site would capture a name the helper reads from the module
+            return node
+        uses = {name: 0 for name in helper.args}
+        for name_node in ast.walk(helper.expression):
+            if isinstance(name_node, ast.Name) and name_node.id in uses:
+                uses[name_node.id] += 1
+        complex_args = [arg for arg in node.args if not isinstance(arg, (ast.Name, ast.Constant))]
+        if len(complex_args) > 1 or any(uses[name] != 1 for name, arg in zip(helper.args, node.args) if arg in complex_args):
+            # an argument with effects has to run exactly once, and in the order the call would run it
+            return node
+        values = dict(zip(helper.args, node.args))
+        body = Substitute(values).visit(ast.parse(ast.unparse(helper.expression), mode="eval").body)
+        self.changed = True
+        self.active.add(helper.name)
+        try:
+            return self.visit(ast.copy_location(body, node))
+        finally:
+            self.active.discard(helper.name)
+
+
+class Substitute(ast.NodeTransformer):
+    def __init__(self, values: dict[str, ast.expr]) -> None:
+        self.values: dict[str, ast.expr] = values
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        return self.values.get(node.id, node)
+
+
+class Optimizer:
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled: bool = enabled
+
+    def optimize(self, code: list[Instruction], retail: Callable[[str], tuple | None]) -> list[Instruction]:
+        # retail recomputes a return's tail-call split once its expression has been rewritten
+        code = self.prune(code)
+        bindings: dict[str, int] = {}
+        self.countBindings(code, bindings)
+        helpers: dict[str, Helper] = {}
+        conditional: set[int] = self.getConditional(code)
+        for position, instruction in enumerate(code):
+            # a definition inside an if or a loop might never run, inlining it would make the call succeed anyway
+            if position in conditional:
+                continue
+            helper = self.findHelper(instruction, bindings)
+            if helper is not None:
+                helpers[helper.name] = helper
+        return self.rewrite(code, helpers, set(), retail, top=True)
+
+    def getConditional(self, code: list[Instruction]) -> set[int]:
+        # every position a forward branch or jump can skip, loop bodies included since their entry branch skips them
+        conditional: set[int] = set()
+        for position, instruction in enumerate(code):
+            offset = instruction.data.get("offset", 0)
+            if offset > 0:
+                conditional.update(range(position + 1, position + 1 + offset))
+        return conditional
+
+    def prune(self, code: list[Instruction]) -> list[Instruction]:
+        # nothing after a return in the same body can run, unless a jump from before it lands there
+        pruned: list[Instruction] = []
+        furthest: int = 0
+        for position, instruction in enumerate(code):
+            if instruction.op == "FUNCTION":
+                instruction = Instruction("FUNCTION", instruction.index, **{**instruction.data, "body": self.prune(instruction.data["body"])})
+            elif "offset" in instruction.data:
+                furthest = max(furthest, position + 1 + instruction.data["offset"])
+            pruned.append(instruction)
+            if instruction.op == "RETURN" and furthest <= position:
+                break
+        return pruned
+
+    def countBindings(self, code: list[Instruction], bindings: dict[str, int]) -> None:
+        for instruction in code:
+            name = instruction.data.get("name") or instruction.data.get("module")
+            if name:
+                bindings[name] = bindings.get(name, 0) + 1
+            if instruction.op == "FUNCTION":
+                for arg in instruction.data["args"]:
+                    bindings[arg.strip("{}")] = bindings.get(arg.strip("{}"), 0) + 1
+                self.countBindings(instruction.data["body"], bindings)
+
+    def findHelper(self, instruction: Instruction, bindings: dict[str, int]) -> Helper | None:
+        # one-line functions bound exactly once, taking no block and not calling themselves
+        if instruction.op != "FUNCTION" or bindings.get(instruction.data["name"]) != 1:
+            return None
+        args, body = instruction.data["args"], instruction.data["body"]
+        if len(body) != 1 or body[0].op != "RETURN" or not body[0].data["expression"].strip():
+            return None
+        if any(not arg.isidentifier() for arg in args):
+            return None
+        try:
+            expression = ast.parse(body[0].data["expression"].strip(), mode="eval").body
+        except SyntaxError:
+            return None
+        for node in ast.walk(expression):
+            if isinstance(node, (ast.Lambda, ast.NamedExpr, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+                return None
+            if isinstance(node, ast.Name) and node.id == instruction.data["name"]:
+                return None
+        return Helper(instruction.data["name"], args, expression)
+
+    def getLocals(self, code: list[Instruction]) -> set[str]:
+        return {instruction.data.get("name") or instruction.data.get("module") for instruction in code if instruction.op != "CALL"} - {None}
+
+    def rewrite(self, code: list[Instruction], helpers: dict[str, Helper], bound: set[str], retail: Callable[[str], tuple | None], top: bool = False) -> list[Instruction]:
+        rewritten: list[Instruction] = []
+        # at the top level a helper is only inlined after its definition has run
+        available: dict[str, Helper] = {} if top else helpers
+        for instruction in code:
+            data = dict(instruction.data)
+            match instruction.op:
+                case "ASSIGNMENT" | "RETURN" | "BRANCH" | "ITERATE":
+                    data["expression"] = self.fold(data["expression"], available, bound)
+                    if instruction.op == "RETURN" and data["expression"] != instruction.data["expression"]:
+                        data["tail"] = retail(data["expression"])
+                case "CALL":
+                    data["arguments"] = self.fold(data["arguments"], available, bound)
+                case "FUNCTION":
+                    scope = bound | self.getLocals(data["body"]) | {arg.strip("{}") for arg in data["args"]}
+                    data["body"] = self.rewrite(data["body"], helpers, scope, retail)
+                    if top and data["name"] in helpers:
+                        available = {**available, data["name"]: helpers[data["name"]]}
+            rewritten.append(Instruction(instruction.op, instruction.index, **data))
+        return rewritten
+
+    def fold(self, expression: str, helpers: dict[str, Helper], bound: set[str]) -> str:
+        if not expression.strip():
+            return expression
+        try:
+            tree = ast.parse(expression.strip(), mode="eval")
+        except SyntaxError:
+            # raw-text call arguments stay exactly as written
+            return expression
+        folder = Folder(helpers, bound)
+        tree = folder.visit(tree)
+        return ast.unparse(tree) if folder.changed else expression
+
+
+optimizer: Optimizer = Optimizer()
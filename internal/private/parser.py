@@ -1,30 +1,59 @@
-from typing import Any, Callable
+from typing import Any, TextIO
+from itertools import count
+import ast
 import math
 import re
-from os import path as ospath
 
-from ..public.char import Char
 from ..public.file import File
+from ..public.frame import Frame
+from ..public.function import Function, running
+from ..public.instruction import Instruction
 from ..public.layer import Layer
-from ..public.safe import safe
+from ..public.location import Location
+from ..public.module import Module
+from ..public.token import Token
+from ..public.scope import Namespace, Scope
 from ..public.parsedmaterial import ParsedMaterial
 from ..public.variable import Variable
+from .budgets import BudgetExceededError, budgets
 from .builtins import Builtins
-from ..public.string import String
-
-class ReturnSignal(Exception):
-    def __init__(self, value: Any) -> None:
-        self.value = value
+from .codecache import code_cache
+from .diskcache import disk_cache
+from .modules import module_registry
+from .optimizer import optimizer
+from .profiler import profiler
+from .stats import stats
+from .lexer import Lexer
+from ..public.string import Rope, String
+
+lambda_ids: count = count()
+# statements taking a condition and a braced body, compiled into jumps within the enclosing code
+CONTROL_KEYWORDS: tuple[str, ...] = ("if", "while", "for")
+LOOP_KEYWORDS: tuple[str, ...] = ("break", "continue")
+FOR_TARGET: re.Pattern = re.compile(r"([^\W\d]\w*)\s+in\s+(.+)", re.DOTALL)
 
 
 class Parser:
-    def __init__(self, file: File) -> None:
+    max_depth: int = 1000
+
+    def __init__(self, file: File, pool: Scope | None = None) -> None:
+        stats.parsers += 1
         self.file: File = file
-        self.char: Char | None = None
+        self.token: Token | None = None
+        self.tokens: list[Token] = []
+        self.position: int = 0
         self.mode_stack: list[dict[str, Any]] = []
         self.sys_stack: list[Layer] = []
-        self.parsed_funcs: list[Callable] = []
-        self.pool: dict[str, Variable] = {
+        self.code: list[Instruction] = []
+        self.pending: str = ""
+        self.source: str = ""
+        self.line_base: int = 0
+        # characters of a fed stream before source, instructions parsed from it hold offsets into the whole stream
+        self.offset_base: int = 0
+        if pool is not None:
+            self.pool: Scope = pool
+            return
+        self.pool: Scope = Scope(parent=Scope({
             "system": Variable(
                 name="system",
                 value=Builtins.system,
@@ -39,6 +68,111 @@ class Parser:
                 children={},
                 parser=self
             ),
+            "spawn": Variable(
+                name="spawn",
+                value=Builtins.spawn,
+                value_type="func",
+                children={},
+                parser=self
+            ),
+            "wait": Variable(
+                name="wait",
+                value=Builtins.wait,
+                value_type="func",
+                children={},
+                parser=self
+            ),
+            "waitall": Variable(
+                name="waitall",
+                value=Builtins.waitall,
+                value_type="func",
+                children={},
+                parser=self
+            ),
+            "parallel": Variable(
+                name="parallel",
+                value=Builtins.parallel,
+                value_type="func",
+                children={},
+                parser=self
+            ),
+            "parallelmap": Variable(
+                name="parallelmap",
+                value=Builtins.parallelmap,
+                value_type="func",
+                children={},
+                parser=self
+            ),
+            "memo": Variable(
+                name="memo",
+                value=Builtins.memo,
+                value_type="func",
+                children={},
+                parser=self
+            ),
+            "readfile": Variable(
+                name="readfile",
+                value=Builtins.readfile,
+                value_type="func",
+                children={},
+                parser=self
+            ),
+            "readlines": Variable(
+                name="readlines",
+                value=Builtins.readlines,
+                value_type="func",
+                children={},
+                parser=self
+            ),
+            "mapfile": Variable(
+                name="mapfile",
+                value=Builtins.mapfile,
+                value_type="func",
+                children={},
+                parser=self
+            ),
+            "writefile": Variable(
+                name="writefile",
+                value=Builtins.writefile,
+                value_type="func",
+                children={},
+                parser=self
+            ),
+            "appendfile": Variable(
+                name="appendfile",
+                value=Builtins.appendfile,
+                value_type="func",
+                children={},
+                parser=self
+            ),
+            "vector": Variable(
+                name="vector",
+                value=Builtins.vector,
+                value_type="func",
+                children={},
+                parser=self
+            ),
+            "loadvector": Variable(
+                name="loadvector",
+                value=Builtins.loadvector,
+                value_type="func",
+                children={},
+                parser=self
+            ),
+            "budget": Variable(
+                name="budget",
+                value=Builtins.budget,
+                value_type="func",
+                children={},
+                parser=self
+            ),
+            "if_": Variable(
+                name="if_",
+                value=Builtins.if_,
+                value_type="func",
+                children={},
+                parser=self
+            ),
             "system_math": Variable(
                 name="system_math",
                 value=math,
@@ -53,7 +187,7 @@ class Parser:
                 children={},
                 parser=self
             )
-        }
+        }))
 
     def getLastModeStackType(self) -> str:
         if self.mode_stack:
@@ -67,48 +201,286 @@ class Parser:
             return f"String({match.group(0)})"
         return re.sub(r'(\"[^\"]*\"|\'[^\']*\')', repl, expr)
 
-
-    @safe
-    def findVariable(self, name: str) -> Variable:
-        """servo.internal.private.parser"""
-        if name in self.pool:
-            val = self.pool[name].value
-            if type(val) is str:
-                return Variable(name, String(val), "string", {}, self)
-            return self.pool[name]
-        
+    def evaluate(self, expression: str) -> Any:
+        stats.evals += 1
+        namespace = self.pool.namespace
+        namespace.refresh()
+        return eval(code_cache.get(expression, self.wrap_strings), namespace)
+
+
+    def findValue(self, name: str) -> Any:
+        stats.lookups += 1
+        namespace = self.pool.namespace
+        namespace.refresh()
+        try:
+            value = namespace[name]
+        except KeyError:
+            value = self.findDotted(namespace, name)
+        return String(value) if type(value) is str else value
+
+    def findDotted(self, namespace: Namespace, name: str) -> Any:
+        # attribute walks that only pass through modules are cached under the dotted name itself
         if "." in name:
             parts = name.split(".")
-            if parts[0] in self.pool:
+            if parts[0] in namespace or parts[0] in self.pool:
                 try:
-                    val = self.pool[parts[0]].value
+                    value = namespace[parts[0]]
+                    cacheable = True
                     for part in parts[1:]:
-                        val = getattr(val, part)
-                    if type(val) is str:
-                         return Variable(name, String(val), "string", {}, self)
-                    return Variable(name, val, "derived", {}, self)
+                        if isinstance(value, Module):
+                            value.__scope__.shared = True
+                        else:
+                            cacheable = False
+                        value = getattr(value, part)
+                    if cacheable:
+                        namespace.cache(name, value)
+                    return value
                 except AttributeError:
                     pass
 
+        stats.lookup_misses += 1
         raise ValueError(f"variable '{name}' not found")
 
-    @safe
     def parse(self) -> ParsedMaterial:
-        """servo.internal.private.parser"""
         return ParsedMaterial(lambda: (self.parseSource(), self.execute())[-1], self)
     def execute(self) -> None:
-        for parsed_func in self.parsed_funcs:
-            parsed_func()
-    def parseSource(self) -> str:
-        for ichar, schar in enumerate(self.file.getContent()):
-            self.char = Char(schar, ichar, self)
-            self.parseChar()
+        self.run(self.code)
+    def run(self, code: list[Instruction]) -> Any:
+        module = self.file.getBaseName().removesuffix(".sv")
+        return self.runFrame(Frame(f"{module}.<module>", "module", self, code, self.pool, module))
+    def runFrame(self, frame: Frame) -> Any:
+        # servo calls made by statements and tail calls push frames here instead of recursing in python
+        stack = self.sys_stack
+        base = len(stack)
+        caller_pool = self.pool
+        caller_parser = getattr(running, "parser", None)
+        running.parser = self
+        budget = budgets
+        self.pushFrame(frame)
+        try:
+            while True:
+                frame = stack[-1]
+                value = None
+                if frame.pc < len(frame.code):
+                    instruction = frame.code[frame.pc]
+                    frame.pc += 1
+                    # one step per instruction, the clock and memory are only looked at every few thousand
+                    # counted after the fetch, so a budget running out is blamed on the instruction about to run
+                    budget.countdown -= 1
+                    if budget.countdown <= 0:
+                        budget.checkpoint()
+                    self.pool = frame.scope
+                    match instruction.op:
+                        case "ASSIGNMENT":
+                            self.runAssignment(instruction)
+                            continue
+                        case "CALL":
+                            callee = self.runCall(instruction)
+                            if callee is not None:
+                                self.pushFrame(callee)
+                            continue
+                        case "RETURN":
+                            value, callee = self.runReturn(instruction)
+                            if callee is not None:
+                                # tail call, the callee takes over the returning frame's place
+                                self.popFrame()
+                                self.pushFrame(callee)
+                                continue
+                        case "FUNCTION":
+                            self.defineFunction(instruction.data["name"], instruction.data["args"], instruction.data["body"], instruction.data.get("source"))
+                            continue
+                        case "IMPORT":
+                            self.runImport(instruction)
+                            continue
+                        case "BRANCH":
+                            if not self.evaluate(instruction.data["expression"]):
+                                frame.pc += instruction.data["offset"]
+                            continue
+                        case "JUMP":
+                            frame.pc += instruction.data["offset"]
+                            continue
+                        case "ITERATE":
+                            # kept by the frame under the position of the NEXT that follows, so recursion gets its own
+                            if frame.iterators is None:
+                                frame.iterators = {}
+                            frame.iterators[frame.pc] = iter(self.evaluate(instruction.data["expression"]))
+                            continue
+                        case "NEXT":
+                            try:
+                                item = next(frame.iterators[frame.pc - 1])
+                            except StopIteration:
+                                del frame.iterators[frame.pc - 1]
+                                frame.pc += instruction.data["offset"]
+                                continue
+                            self.bindValue(instruction.data["name"], item)
+                            continue
+                        case "BREAK" | "CONTINUE":
+                            raise SyntaxError(f"'{instruction.op.lower()}' outside a loop")
+                # the frame returned or ran out of instructions, a statement call's value is dropped
+                self.popFrame()
+                if len(stack) == base:
+                    return value
+        except Exception as error:
+            # no bookkeeping while running, the failing instruction is found from the frame that raised
+            current = stack[-1] if len(stack) > base else frame
+            origin = current.function.parser if current.function is not None else current.parser
+            self.locate(error, origin, current.code[current.pc - 1].index if current.pc else 0, current.function)
+            raise
+        finally:
+            while len(stack) > base:
+                self.popFrame()
+            self.pool = caller_pool
+            running.parser = caller_parser
+    def locate(self, error: Exception, origin: "Parser", offset: int, function: Function | None = None) -> None:
+        # the innermost location wins, outer frames re-raise the same error
+        if getattr(error, "location", None) is None:
+            try:
+                source, offset, line_base = origin.getSourceAt(offset, function)
+                error.location = Location(origin.file.getPath(), source, offset, line_base)
+            except AttributeError:
+                pass
+    def getSourceAt(self, offset: int, function: Function | None = None) -> tuple[str, int, int]:
+        # the text an offset points into, with the offset made relative to it and the lines before it
+        if offset >= self.offset_base:
+            return self.source or self.file.getContent() or "", offset - self.offset_base, self.line_base
+        if function is not None and function.source is not None:
+            start, line_base, text = function.source
+            if start <= offset <= start + len(text):
+                return text, offset - start, line_base
+        return "", -1, self.line_base
+    def createWorker(self) -> "Parser":
+        # a parser with its own stack over the same scopes, for running servo code on another thread
+        return Parser(self.file, self.pool)
+    def pushFrame(self, frame: Frame) -> None:
+        if len(self.sys_stack) >= Parser.max_depth:
+            raise RecursionError(f"maximum servo call depth of {Parser.max_depth} exceeded in '{frame.name}'")
+        if frame.function is not None:
+            stats.calls += 1
+        if profiler.enabled:
+            profiler.enter(frame)
+        else:
+            self.sys_stack.append(frame)
+    def popFrame(self) -> None:
+        if profiler.enabled:
+            profiler.leave(self.sys_stack[-1])
+        else:
+            self.sys_stack.pop()
+    def compile(self, tokens: list[Token]) -> list[Instruction]:
+        compiler: Parser = Parser(self.file, Scope())
+        compiler.source = self.source
+        compiler.line_base = self.line_base
+        compiler.offset_base = self.offset_base
+        compiler.parseTokens(tokens)
+        return compiler.code
+    def parseSource(self, source: str | None = None) -> str:
+        with stats.phase("parse"):
+            if source is None:
+                code = module_registry.getCompiled(self.file.getPath())
+                if code is None:
+                    code = disk_cache.load(self.file)
+                    if code is not None:
+                        stats.disk_cache_hits += 1
+                if code is not None:
+                    self.code = code
+                    module_registry.keepCompiled(self.file.getPath(), code)
+                    return
+            self.source = self.file.getContent() if source is None else source
+            self.parseTokens(Lexer(self.source).tokenize())
+            if optimizer.enabled:
+                self.code = optimizer.optimize(self.code, self.findTail)
+            if source is None:
+                disk_cache.store(self.file, self.code, self.wrap_strings)
+                module_registry.keepCompiled(self.file.getPath(), self.code)
+    def parseTokens(self, tokens: list[Token]) -> None:
+        stats.tokens += len(tokens)
+        self.tokens = tokens
+        try:
+            for self.position, self.token in enumerate(tokens):
+                self.parseToken()
+            self.parseEnd()
+        except Exception as error:
+            self.locate(error, self, self.offset_base + (self.token.start if self.token else len(self.source)))
+            raise
+    def parseEnd(self) -> None:
+        if self.mode_stack and self.mode_stack[-1]["type"] != "WAIT_BLOCK":
+            # the last line may end without a newline, it finishes as if it had one
+            end = self.tokens[-1].end if self.tokens else 0
+            self.token = Token("NEWLINE", end, end, self.source)
+            self.parseToken()
         if self.mode_stack and self.mode_stack[-1]["type"] == "WAIT_BLOCK":
             self.parseWaitBlock(eof=True)
         
         if self.mode_stack:
-             raise SyntaxError(f"Unexpected end of file. Unterminated mode: {self.mode_stack[-1]['type']}")
-    def parseChar(self, match_value: str | None = None) -> None:
+             error = SyntaxError(f"Unexpected end of file. Unterminated mode: {self.mode_stack[-1]['type']}")
+             # point at where the unfinished statement began rather than at the end of the file
+             self.locate(error, self, self.offset_base + self.mode_stack[0].get("index", len(self.source)))
+             raise error
+    def feed(self, chunk: str, final: bool = False, interactive: bool = False) -> None:
+        # parses the complete lines fed so far and runs each top-level statement as soon as it is finished
+        self.source = self.pending + chunk
+        end: int = len(self.source) if final else self.source.rfind("\n") + 1
+        self.tokens = Lexer(self.source).tokenize(end, partial=not final)
+        stats.tokens += len(self.tokens)
+        cut: int = 0
+        try:
+            for self.position, self.token in enumerate(self.tokens):
+                self.parseToken()
+                if not self.mode_stack:
+                    cut = self.token.end
+                    self.runPending()
+            if final or (interactive and len(self.mode_stack) == 1 and self.mode_stack[0]["type"] == "WAIT_BLOCK" and not self.mode_stack[0]["block"]):
+                # at a prompt a call cannot wait for a block on a later line
+                self.parseEnd()
+                cut = end
+                self.runPending()
+        except Exception as error:
+            self.locate(error, self, self.offset_base + (self.token.start if self.token else len(self.source)))
+            # the rest of the text is dropped by reset, after what ran of it has been counted
+            self.pending = self.source
+            raise
+        if self.mode_stack:
+            # the unfinished statement is parsed again once the rest of it arrives
+            self.mode_stack.clear()
+            self.code = []
+        # keeps reported line numbers counting from the start of the stream
+        self.line_base += self.source.count("\n", 0, cut)
+        self.offset_base += cut
+        self.pending = self.source[cut:]
+    def runPending(self) -> None:
+        code, self.code = self.code, []
+        for instruction in code:
+            if instruction.op == "FUNCTION" and instruction.data["body"]:
+                # its body runs long after this chunk is replaced, the function keeps just its own text to report errors
+                start = self.source.rfind("\n", 0, self.getFirstIndex(instruction.data["body"])) + 1
+                self.attachSource(instruction, (self.offset_base + start, self.line_base + self.source.count("\n", 0, start), self.source[start:instruction.index + 1]))
+        if self.offset_base:
+            self.rebase(code, self.offset_base)
+        self.run(code)
+    def getFirstIndex(self, code: list[Instruction]) -> int:
+        # a nested function is placed at its closing brace, its body starts before it
+        return min(self.getFirstIndex(instruction.data["body"]) if instruction.op == "FUNCTION" and instruction.data["body"] else instruction.index for instruction in code)
+    def attachSource(self, instruction: Instruction, source: tuple[int, int, str]) -> None:
+        # functions defined inside it fall within the same text
+        instruction.data["source"] = source
+        for inner in instruction.data["body"]:
+            if inner.op == "FUNCTION":
+                self.attachSource(inner, source)
+    def rebase(self, code: list[Instruction], base: int) -> None:
+        for instruction in code:
+            instruction.index += base
+            if "body" in instruction.data:
+                self.rebase(instruction.data["body"], base)
+    def stream(self, reader: TextIO, chunk_size: int = 1 << 16) -> None:
+        while chunk := reader.read(chunk_size):
+            self.feed(chunk)
+        self.feed("", final=True)
+    def reset(self) -> None:
+        self.mode_stack.clear()
+        self.code = []
+        self.line_base += self.pending.count("\n")
+        self.offset_base += len(self.pending)
+        self.pending = ""
+    def parseToken(self, match_value: str | None = None) -> None:
         match match_value or self.getLastModeStackType():
             case "NULL":
                 self.parseNull()
@@ -118,14 +490,8 @@ class Parser:
                 self.parseCall()
             case "CHECK_ASSIGNMENT":
                 self.parseCheckAssignment()
-            case "STRING":
-                self.parseString()
             case "MATH":
                 self.parseMath()
-            case "COMMENT":
-                self.parseComment()
-            case "MLCOMMENT":
-                self.parseMLComment()
             case "ARTIFACT":
                 self.parseArtifact()
             case "INTEGER":
@@ -140,396 +506,479 @@ class Parser:
                 self.parseWaitBlock()
             case "RETURN":
                 self.parseReturn()
+            case "CONTROL":
+                self.parseControl()
 
     def parseNull(self) -> None:
-        if self.char.string.isalpha() or self.char.string == "_":
-            self.mode_stack.append({"type": "IDENTIFIER", "buffer": self.char.string})
-        elif self.char.string in "\"'":
-            self.mode_stack.append({"type": "STRING", "buffer": "", "quote": self.char.string})
-        elif self.char.string.isdigit():
-            self.mode_stack.append({"type": "INTEGER", "buffer": self.char.string})
-        elif self.char.string == "#":
-            self.mode_stack.append({"type": "COMMENT"})
-        elif self.char.string == "/" and self.char.index + 1 < len(self.file.getContent()) and self.file.getContent()[self.char.index + 1] == "*":
-            self.mode_stack.append({"type": "MLCOMMENT"})
-        elif self.char.string == "<":
-            self.mode_stack.append({"type": "ARTIFACT", "buffer": ""})
-        elif self.char.string == "{":
-            self.mode_stack.append({"type": "BLOCK", "buffer": "", "nesting": 0})
-        elif self.char.string.isspace(): # Handle whitespace including newlines in NULL
+        token = self.token
+        if token.type == "NAME":
+            self.mode_stack.append({"type": "IDENTIFIER", "name": token.getString(), "index": token.start})
+        elif token.type == "NUMBER":
+            self.mode_stack.append({"type": "INTEGER", "start": token.start})
+        elif token.type in ("SPACE", "NEWLINE", "COMMENT", "MLCOMMENT", "STRING"):
             pass
+        elif token.getString() == "<":
+            self.mode_stack.append({"type": "ARTIFACT", "start": token.end})
+        elif token.getString() == "{":
+            self.mode_stack.append({"type": "BLOCK", "first": self.position + 1, "nesting": 0})
+        elif token.getString() in "\"'":
+             raise SyntaxError("Unexpected end of line. Unterminated string")
         else:
-             raise SyntaxError(f"Unexpected character: '{self.char.string}'")
+             raise SyntaxError(f"Unexpected character: '{token.getString()}'")
 
     def parseIdentifier(self) -> None:
-        if self.char.string.isalnum() or self.char.string in "_.":
-            self.mode_stack[-1]["buffer"] += self.char.string
-        elif self.char.string == "(":
-            # check if it's a function def or call
-             # Logic change: keywords check first?
-             # But parseIdentifier builds buffer char by char.
-             # We only know it's "fn" when we hit space or (.
-             
-            # If buffer is "fn", this is invalid usually, unless "fn("? No, fn name(...
-            
-            # Use buffer to check for keywords
-            self.mode_stack.append({"type": "CALL", "identifier": self.mode_stack[-1]["buffer"], "buffer": ""})
-            self.mode_stack.pop(-2)
-        elif self.char.string.isspace():
-             if self.mode_stack[-1]["buffer"] == "fn":
-                 self.mode_stack.pop() # remove IDENTIFIER
-                 self.mode_stack.append({"type": "FUNCTION_DEF", "phase": "name", "name": "", "args": [], "buffer": ""})
-             elif self.mode_stack[-1]["buffer"] == "return":
-                 self.mode_stack.pop() # remove IDENTIFIER
-                 self.mode_stack.append({"type": "RETURN", "buffer": ""})
+        token = self.token
+        mode = self.mode_stack[-1]
+        if mode["name"] in CONTROL_KEYWORDS and (token.type in ("SPACE", "NEWLINE") or token.getString() == "("):
+            self.mode_stack[-1] = {"type": "CONTROL", "keyword": mode["name"], "index": mode["index"], "phase": "condition", "start": token.start, "nesting": 0}
+            self.parseControl()
+        elif mode["name"] in LOOP_KEYWORDS and token.type in ("SPACE", "NEWLINE"):
+            # resolved into a jump by the innermost loop around it
+            self.mode_stack.pop()
+            self.code.append(Instruction(mode["name"].upper(), mode["index"]))
+        elif token.getString() == "(":
+            self.mode_stack[-1] = {"type": "CALL", "identifier": mode["name"], "index": mode["index"], "start": token.end, "pieces": [], "nesting": 0}
+        elif token.type in ("SPACE", "NEWLINE"):
+             if mode["name"] == "fn":
+                 self.mode_stack[-1] = {"type": "FUNCTION_DEF", "phase": "name", "start": token.end}
+             elif mode["name"] == "return":
+                 self.mode_stack[-1] = {"type": "RETURN", "index": mode["index"], "start": token.end}
+                 if token.type == "NEWLINE":
+                     self.parseReturn()
              else:
-                 self.mode_stack[-1]["type"] = "CHECK_ASSIGNMENT"
-        elif self.char.string == "=":
+                 mode["type"] = "CHECK_ASSIGNMENT"
+        elif token.getString() == "=":
              # Assignment directly (no space)
-             var_name = self.mode_stack[-1]["buffer"].strip()
-             self.mode_stack.pop() # remove IDENTIFIER
-             self.mode_stack.append({"type": "ASSIGNMENT", "name": var_name, "buffer": ""})
+             self.mode_stack[-1] = {"type": "ASSIGNMENT", "name": mode["name"], "index": mode["index"], "start": token.end}
         else:
              # End of identifier, likely just a variable access if in an expression, but here parseIdentifier is usually top level or start of something
-             # If we are just popping, we lose the buffer.
-             # If this is top level, and we hit space, it might be ignored?
-             # existing parser just pops.
+             # If we are just popping, we lose the token.
             self.mode_stack.pop()
 
 
     def parseCheckAssignment(self) -> None:
-        if self.char.string.isspace() and self.char.string != "\n":
+        if self.token.type == "SPACE":
             return
-        elif self.char.string == "=":
-            self.mode_stack[-1]["type"] = "ASSIGNMENT"
-            self.mode_stack[-1]["name"] = self.mode_stack[-1]["buffer"].strip()
-            self.mode_stack[-1]["buffer"] = ""
-        elif self.char.string == "\n":
-            raise SyntaxError(f"Unexpected token/newline after identifier '{self.mode_stack[-1]['buffer']}'")
+        elif self.token.getString() == "=":
+            self.mode_stack[-1] = {"type": "ASSIGNMENT", "name": self.mode_stack[-1]["name"], "index": self.mode_stack[-1]["index"], "start": self.token.end}
+        elif self.token.type == "NEWLINE":
+            raise SyntaxError(f"Unexpected token/newline after identifier '{self.mode_stack[-1]['name']}'")
         else:
-            raise SyntaxError(f"Unexpected token '{self.char.string}' after identifier")
+            raise SyntaxError(f"Unexpected token '{self.token.getString()}' after identifier")
 
     def parseInteger(self) -> None:
-        if self.char.string.isdigit():
-            self.mode_stack[-1]["buffer"] += self.char.string
-        elif self.char.string in "+-*/%^":
+        if self.token.getString() in ("+", "-", "*", "/", "%", "^"):
             self.mode_stack[-1]["type"] = "MATH"
-            self.mode_stack[-1]["buffer"] += self.char.string
-        elif self.char.string == ")":
-             # End of integer in a call? or just end of int
-             # If we are in CALL, we need to return control.
-             # existing parser pop() handles it by going back to parent
-             self.mode_stack.pop()
-             # We should NOT parseChar again if it's ')' as it might be consumed by parent?
-             # existing parser: self.parseChar()
-             # If we call parseChar(), it will be processed by parent.
-             self.parseChar()
         else:
+            # End of integer, let the parent handle this token
             self.mode_stack.pop()
-            self.parseChar()
+            self.parseToken()
 
     def parseAssignment(self) -> None:
-        if self.char.string == "\n":
-            expression = self.mode_stack[-1]["buffer"].strip()
-            var_name = self.mode_stack[-1]["name"]
-            self.mode_stack.pop()
+        if self.token.type == "NEWLINE":
+            mode = self.mode_stack.pop()
+            expression = self.source[mode["start"]:self.token.start].strip()
             
             if expression:
-                scope = {n: v.value for n, v in self.pool.items()}
-                scope["String"] = String
-                try:
-                    expression = self.wrap_strings(expression)
-                    val = eval(expression, {}, scope)
-                    if type(val) is str:
-                        val = String(val)
-                    self.pool[var_name] = Variable(var_name, val, type(val).__name__, {}, self)
-                except Exception as e:
-                    # print(f"Assignment error: {e}") 
-                    pass
-        else:
-            self.mode_stack[-1]["buffer"] += self.char.string
+                self.code.append(Instruction("ASSIGNMENT", mode["index"], name=mode["name"], expression=expression, pieces=self.findPieces(mode["name"], expression)))
+
+    def findPieces(self, name: str, expression: str) -> list[str] | None:
+        # s = s + a + b appends a and b to the text s already holds instead of copying it
+        text = expression.lstrip()
+        if not text.startswith(name) or not text[len(name):].lstrip().startswith("+"):
+            # most assignments never get as far as ast
+            return None
+        try:
+            tree = ast.parse(expression, mode="eval").body
+        except SyntaxError:
+            return None
+        pieces: list[str] = []
+        while isinstance(tree, ast.BinOp) and isinstance(tree.op, ast.Add):
+            pieces.append(ast.get_source_segment(expression, tree.right))
+            tree = tree.left
+        if not pieces or not isinstance(tree, ast.Name) or tree.id != name:
+            return None
+        return pieces[::-1]
+
+    def runAssignment(self, instruction: Instruction) -> None:
+        var_name = instruction.data["name"]
+        try:
+            pieces = instruction.data.get("pieces")
+            if pieces is not None:
+                variable = dict.get(self.pool, var_name)
+                if variable is not None and type(variable.value) in (String, Rope):
+                    # the same pieces String + would have joined, in the same order
+                    rope = variable.value if type(variable.value) is Rope else Rope([variable.value])
+                    for piece in pieces:
+                        rope = rope + self.evaluate(piece)
+                    self.pool[var_name] = Variable(var_name, rope, "String", {}, self)
+                    return
+            val = self.evaluate(instruction.data["expression"])
+            self.bindValue(var_name, val)
+        except (BudgetExceededError, RecursionError):
+            raise
+        except Exception as e:
+            if getattr(e, "location", None) is not None:
+                raise
+            # print(f"Assignment error: {e}") 
+            pass
+    def bindValue(self, name: str, value: Any) -> None:
+        if type(value) is str:
+            value = String(value)
+        self.pool[name] = Variable(name, value, type(value).__name__, {}, self)
 
     def parseFunctionDef(self) -> None:
         mode = self.mode_stack[-1]
-        char = self.char.string
+        token = self.token
+        char = token.getString()
         phase = mode["phase"]
 
         if phase == "name":
             if char == "(":
-                mode["name"] = mode["buffer"].strip()
-                mode["buffer"] = ""
+                mode["name"] = "".join(self.source[mode["start"]:token.start].split())
+                mode["start"] = token.end
                 mode["phase"] = "args"
-            elif char.strip():
-                mode["buffer"] += char
         elif phase == "args":
             if char == ")":
-                 args_str = mode["buffer"]
-                 raw_args = [a.strip() for a in args_str.split(",") if a.strip()]
-                 mode["args"] = raw_args
-                 mode["buffer"] = ""
+                 args_str = self.source[mode["start"]:token.start]
+                 mode["args"] = [a.strip() for a in args_str.split(",") if a.strip()]
                  mode["phase"] = "before_body"
-            else:
-                 mode["buffer"] += char
         elif phase == "before_body":
              if char == "{":
                  mode["phase"] = "body"
                  mode["nesting"] = 1
-                 mode["buffer"] = ""
+                 mode["first"] = self.position + 1
         elif phase == "body":
              if char == "{":
                  mode["nesting"] += 1
-                 mode["buffer"] += char
              elif char == "}":
                  mode["nesting"] -= 1
                  if mode["nesting"] == 0:
-                     self.defineFunction(mode["name"], mode["args"], mode["buffer"])
+                     body = self.compile(self.tokens[mode["first"]:self.position])
+                     self.code.append(Instruction("FUNCTION", token.start, name=mode["name"], args=mode["args"], body=body))
                      self.mode_stack.pop()
-                 else:
-                     mode["buffer"] += char
-             else:
-                 mode["buffer"] += char
-
-    def defineFunction(self, name: str, args: list[str], body: str) -> None:
-        clean_args = []
-        block_arg_index = -1
-        for i, arg in enumerate(args):
-            if arg.startswith("{") and arg.endswith("}"):
-                if block_arg_index != -1:
-                    raise ValueError("multiple block arguments not supported")
-                clean_args.append(arg[1:-1])
-                block_arg_index = i
-            else:
-                clean_args.append(arg)
 
-        def func_impl(*call_args: Any) -> Any:
-            actual_args = []
-            if len(call_args) == 1 and isinstance(call_args[0], tuple):
-                actual_args = list(call_args[0])
-            else:
-                actual_args = list(call_args)
-            
-            if len(actual_args) == 1 and actual_args[0] == "":
-                 actual_args = []
-            for i in range(len(actual_args)):
-                if type(actual_args[i]) is str:
-                    actual_args[i] = String(actual_args[i])
-            
-            # Simple fix for VirtualFile
-            class VirtualFile(File):
-                def __init__(self, c): self.c = c
-                def getContent(self): return self.c
-            
-            func_parser = Parser(VirtualFile(body))
-            func_parser.pool = self.pool.copy()
-            for i, arg_name in enumerate(clean_args):
-                if i < len(actual_args):
-                    func_parser.pool[arg_name] = Variable(arg_name, actual_args[i], "arg", {}, func_parser)
-            try:
-                return func_parser.parse().execute()
-            except ReturnSignal as rs:
-                return rs.value
-        
-        func_impl.block_arg_index = block_arg_index # type: ignore
-        self.pool[name] = Variable(name, func_impl, "func", {}, self)
+    def defineFunction(self, name: str, args: list[str], body: list[Instruction], source: tuple[int, int, str] | None = None) -> None:
+        # body was compiled once by parseFunctionDef/parseBlock, a call only binds and runs it
+        module = self.sys_stack[-1].module if self.sys_stack else self.file.getBaseName().removesuffix(".sv")
+        self.pool[name] = Variable(name, Function(name, args, body, self.pool, module, self, source), "func", {}, self)
 
     def parseBlock(self) -> None:
         mode = self.mode_stack[-1]
-        char = self.char.string
+        char = self.token.getString()
         
         if char == "{":
             mode["nesting"] += 1
-            mode["buffer"] += char
         elif char == "}":
             mode["nesting"] -= 1
             if mode["nesting"] == 0:
-                block_code = mode["buffer"]
+                block_code = self.compile(self.tokens[mode["first"]:self.position])
                 self.mode_stack.pop()
                 
                 # Create lambda
-                anon_name = f"__lambda_{len(self.pool)}"
-                self.defineFunction(anon_name, [], block_code)
+                anon_name = f"__lambda_{next(lambda_ids)}"
+                self.code.append(Instruction("FUNCTION", self.token.start, name=anon_name, args=[], body=block_code))
                 
                 # Check parent
                 if self.mode_stack:
                     parent = self.mode_stack[-1]
-                    if "buffer" in parent:
-                         parent["buffer"] += anon_name
-            else:
-                mode["buffer"] += char
-        else:
-            mode["buffer"] += char
+                    if parent["type"] == "CALL":
+                        # the block stands in for its source text inside the call arguments
+                        parent["pieces"] += [self.source[parent["start"]:self.tokens[mode["first"] - 1].start], anon_name]
+                        parent["start"] = self.token.end
+                    elif parent["type"] == "WAIT_BLOCK":
+                        parent["block"] = anon_name
 
     def parseWaitBlock(self, eof: bool = False) -> None:
         mode = self.mode_stack[-1]
         
-        # If we have a buffer (lambda name populated by BLOCK), execute
-        if mode["buffer"]:
-            run_args = mode["run_args"]
-            block_idx = mode["func"].value.block_arg_index
-            
-            final_args = []
-            if isinstance(run_args, tuple):
-                final_args = list(run_args)
-            elif run_args is not None and run_args != "":
-                final_args = [run_args]
-            
-            # Insert lambda at correct position
-            # Make sure list is long enough
-            while len(final_args) < block_idx:
-                final_args.append(None)
-            
-            # If we need to insert
-            if len(final_args) == block_idx:
-                 final_args.append(self.findVariable(mode["buffer"]).value)
-            else:
-                 # Override or insert?
-                 # If user provided something, we might override it or fail.
-                 # Assuming insert strictly at index for now.
-                 final_args.insert(block_idx, self.findVariable(mode["buffer"]).value)
-                 
+        # If we have a block (lambda name set by BLOCK), the call takes it as its block
+        if mode["block"]:
             self.mode_stack.pop()
-            mode["func"].call(tuple(final_args))
+            self.code.append(Instruction("CALL", mode["index"], identifier=mode["identifier"], arguments=mode["arguments"], block=mode["block"]))
             
-            # Process current char again since we are done with WAIT_BLOCK
+            # Process current token again since we are done with WAIT_BLOCK
             if not eof:
-                self.parseChar()
+                self.parseToken()
             return
 
-        if not eof and self.char.string.isspace():
+        if not eof and self.token.type in ("SPACE", "NEWLINE"):
             return
             
-        if not eof and self.char.string == "{":
-            self.mode_stack.append({"type": "BLOCK", "buffer": "", "nesting": 1})
+        if not eof and self.token.getString() == "{":
+            self.mode_stack.append({"type": "BLOCK", "first": self.position + 1, "nesting": 1})
             return
             
-        # Any other char means no block provided (or passed inline), execute immediately
+        # Any other token means no block provided (or passed inline), call without one
         self.mode_stack.pop()
-        mode["func"].call(mode["run_args"])
+        self.code.append(Instruction("CALL", mode["index"], identifier=mode["identifier"], arguments=mode["arguments"], block=None))
         if not eof:
-            self.parseChar()
+            self.parseToken()
             
-    def parseReturn(self) -> None:
-        if self.char.string == "\n":
-            buffer = self.mode_stack[-1]["buffer"]
-            self.mode_stack.pop()
-            val = None
-            if buffer.strip():
-                 scope = {n: v.value for n, v in self.pool.items()}
-                 try:
-                     buffer = self.wrap_strings(buffer)
-                     val = eval(buffer, {}, scope)
-                 except Exception as e:
-                     raise ValueError(f"Return evaluation error: {e}")
-            raise ReturnSignal(val)
+    def parseControl(self) -> None:
+        mode = self.mode_stack[-1]
+        token = self.token
+        char = token.getString()
+        match mode["phase"]:
+            case "condition":
+                if token.type != "SYMBOL":
+                    if token.type == "NEWLINE" and mode["nesting"] == 0:
+                        raise SyntaxError(f"Expected '{{' after '{mode['keyword']}' condition")
+                elif char in "([":
+                    mode["nesting"] += 1
+                elif char in ")]":
+                    mode["nesting"] -= 1
+                elif char == "{" and mode["nesting"] == 0:
+                    mode["condition"] = self.source[mode["start"]:token.start].strip()
+                    if not mode["condition"]:
+                        raise SyntaxError(f"'{mode['keyword']}' without a condition")
+                    if mode["keyword"] == "for" and FOR_TARGET.fullmatch(self.unwrapParentheses(mode["condition"])) is None:
+                        raise SyntaxError(f"Expected 'for <name> in <iterable>', got 'for {mode['condition']}'")
+                    mode.update(phase="body", first=self.position + 1, nesting=1)
+            case "body" | "else_body":
+                if char == "{":
+                    mode["nesting"] += 1
+                elif char == "}":
+                    mode["nesting"] -= 1
+                    if mode["nesting"] == 0:
+                        # compiled once here, every iteration jumps back into the same instructions
+                        mode["orelse" if mode["phase"] == "else_body" else "body"] = self.compile(self.tokens[mode["first"]:self.position])
+                        if mode["keyword"] == "if" and mode["phase"] == "body":
+                            mode["phase"] = "after_body"
+                        else:
+                            self.finishControl()
+            case "after_body":
+                # else has to follow the closing brace on the same line
+                if token.type == "SPACE":
+                    return
+                if token.type == "NAME" and char == "else":
+                    mode["phase"] = "else"
+                    return
+                self.finishControl()
+                self.parseToken()
+            case "else":
+                if token.type == "SPACE":
+                    return
+                if char == "{":
+                    mode.update(phase="else_body", first=self.position + 1, nesting=1)
+                elif token.type == "NAME" and char == "if":
+                    # else if, the chained statement becomes the whole else branch
+                    self.mode_stack.append({"type": "IDENTIFIER", "name": "if", "index": token.start})
+                else:
+                    raise SyntaxError(f"Expected '{{' or 'if' after 'else', got '{char}'")
+
+    def finishControl(self) -> None:
+        mode = self.mode_stack.pop()
+        code = self.assembleControl(mode)
+        if self.mode_stack and self.mode_stack[-1]["type"] == "CONTROL" and self.mode_stack[-1]["phase"] == "else":
+            self.mode_stack[-1]["orelse"] = code
+            self.finishControl()
         else:
-             self.mode_stack[-1]["buffer"] += self.char.string
+            self.code += code
+
+    def assembleControl(self, mode: dict[str, Any]) -> list[Instruction]:
+        # offsets count from the instruction after the jump
+        # a parenthesized if or while condition is already a python expression
+        index, condition, body = mode["index"], mode["condition"], mode["body"]
+        match mode["keyword"]:
+            case "if":
+                orelse = mode.get("orelse")
+                if orelse is None:
+                    return [Instruction("BRANCH", index, expression=condition, offset=len(body)), *body]
+                return [Instruction("BRANCH", index, expression=condition, offset=len(body) + 1), *body, Instruction("JUMP", index, offset=len(orelse)), *orelse]
+            case "while":
+                code = [Instruction("BRANCH", index, expression=condition, offset=len(body) + 1), *body, Instruction("JUMP", index, offset=-len(body) - 2)]
+                return self.resolveLoop(code, 0, len(code))
+            case "for":
+                target = FOR_TARGET.fullmatch(self.unwrapParentheses(condition))
+                code = [
+                    Instruction("ITERATE", index, expression=target.group(2)),
+                    Instruction("NEXT", index, name=target.group(1), offset=len(body) + 1),
+                    *body,
+                    Instruction("JUMP", index, offset=-len(body) - 2)
+                ]
+                return self.resolveLoop(code, 1, len(code))
+
+    def unwrapParentheses(self, text: str) -> str:
+        # only a pair around the whole text, '(a) in (b)' keeps its own
+        if not (text.startswith("(") and text.endswith(")")):
+            return text
+        depth = 0
+        for position, char in enumerate(text):
+            depth += char == "("
+            depth -= char == ")"
+            if depth == 0 and position < len(text) - 1:
+                return text
+        return text[1:-1].strip()
+
+    def resolveLoop(self, code: list[Instruction], top: int, end: int) -> list[Instruction]:
+        # breaks and continues left by the body belong to this loop, nested loops already took theirs
+        for position, instruction in enumerate(code):
+            if instruction.op in ("BREAK", "CONTINUE"):
+                target = end if instruction.op == "BREAK" else top
+                code[position] = Instruction("JUMP", instruction.index, offset=target - position - 1)
+        return code
+
+    def parseReturn(self) -> None:
+        if self.token.type == "NEWLINE":
+            mode = self.mode_stack.pop()
+            expression = self.source[mode["start"]:self.token.start]
+            self.code.append(Instruction("RETURN", mode["index"], expression=expression, tail=self.findTail(expression)))
+
+    def findTail(self, expression: str) -> tuple | None:
+        # splits a return expression into the conditionals and the call in tail position, if there is one
+        try:
+            tree = ast.parse(expression.strip(), mode="eval").body
+        except SyntaxError:
+            return None
+        def walk(node: ast.expr) -> tuple:
+            if isinstance(node, ast.IfExp):
+                return ("if", ast.get_source_segment(expression.strip(), node.test), walk(node.body), walk(node.orelse))
+            if isinstance(node, ast.Call) and not node.keywords and not any(isinstance(arg, ast.Starred) for arg in node.args):
+                name = ast.get_source_segment(expression.strip(), node.func)
+                if all(part.isidentifier() for part in name.split(".")):
+                    args = [ast.get_source_segment(expression.strip(), arg) for arg in node.args]
+                    return ("call", name, f"({', '.join(args)},)" if args else "()", ast.get_source_segment(expression.strip(), node))
+            return ("value", ast.get_source_segment(expression.strip(), node))
+        return walk(tree)
+
+    def runReturn(self, instruction: Instruction) -> tuple[Any, Frame | None]:
+        buffer = instruction.data["expression"]
+        tail = instruction.data["tail"]
+        if not buffer.strip():
+            return None, None
+        try:
+            if tail is None:
+                return self.evaluate(buffer), None
+            while tail[0] == "if":
+                tail = tail[2] if self.evaluate(tail[1]) else tail[3]
+            if tail[0] == "call":
+                namespace = self.pool.namespace
+                namespace.refresh()
+                try:
+                    callee = namespace[tail[1]]
+                except KeyError:
+                    callee = self.findDotted(namespace, tail[1]) if "." in tail[1] else None
+                if isinstance(callee, Function):
+                    return None, callee.createFrame(self.evaluate(tail[2]), self)
+            return self.evaluate(tail[-1]), None
+        except (BudgetExceededError, RecursionError):
+            raise
+        except Exception as e:
+            if getattr(e, "location", None) is not None:
+                # already wrapped and located by the frame it came from
+                raise
+            raise ValueError(f"Return evaluation error: {e}")
     def parseCall(self) -> None:
         mode = self.mode_stack[-1]
-        char = self.char.string
+        char = self.token.getString()
 
         if char == "{":
-            self.mode_stack.append({"type": "BLOCK", "buffer": "", "nesting": 1})
-            return
-
-        if mode.get("quote"):
-            mode["buffer"] += char
-            if char == mode["quote"]:
-                mode["quote"] = None
-            return
-
-        if char in "'\"":
-            mode["quote"] = char
-            mode["buffer"] += char
-            return
-
-        if char == "(":
-            mode["nesting"] = mode.get("nesting", 0) + 1
-            mode["buffer"] += char
+            self.mode_stack.append({"type": "BLOCK", "first": self.position + 1, "nesting": 1})
+        elif char in "\"'":
+            raise SyntaxError("Unexpected end of line. Unterminated string")
+        elif char == "(":
+            mode["nesting"] += 1
         elif char == ")":
-            if mode.get("nesting", 0) > 0:
+            if mode["nesting"] > 0:
                 mode["nesting"] -= 1
-                mode["buffer"] += char
             else:
-                identifier = mode["identifier"]
-                arg_str = mode["buffer"]
                 self.mode_stack.pop()
-                
-                val = arg_str
-                if arg_str.strip():
-                    scope = {n: v.value for n, v in self.pool.items()}
-                    scope["String"] = String
-                    try:
-                        arg_str = self.wrap_strings(arg_str)
-                        val = eval(arg_str, {}, scope)
-                    except SyntaxError:
-                        raise
-                    except Exception as e:
-                        # print(f"DEBUG: Eval failed for '{arg_str}': {e}")
-                        pass
-                
-                
-                var = self.findVariable(identifier)
-                if var.value_type == "func" and getattr(var.value, "block_arg_index", -1) != -1:
-                     self.mode_stack.append({"type": "WAIT_BLOCK", "func": var, "run_args": val, "buffer": ""})
-                else:
-                     var.call(val)
-        else:
-            mode["buffer"] += char
-
-    def parseString(self) -> None:
-        if self.char.string == self.mode_stack[-1]["quote"]:
-            self.mode_stack.pop()
+                arguments = "".join(mode["pieces"]) + self.source[mode["start"]:self.token.start]
+                # whether the callee takes a trailing block is only known at run time
+                self.mode_stack.append({"type": "WAIT_BLOCK", "identifier": mode["identifier"], "arguments": arguments, "index": mode["index"], "block": None})
+
+    def runCall(self, instruction: Instruction) -> Frame | None:
+        arg_str = instruction.data["arguments"]
+        val = arg_str
+        if arg_str.strip():
+            try:
+                val = self.evaluate(arg_str)
+            except (SyntaxError, BudgetExceededError, RecursionError):
+                raise
+            except Exception as e:
+                if getattr(e, "location", None) is not None:
+                    raise
+                # print(f"DEBUG: Eval failed for '{arg_str}': {e}")
+                pass
+
+        callee = self.findValue(instruction.data["identifier"])
+        if not callable(callee):
+            raise TypeError(f"Variable '{instruction.data['identifier']}' is not callable")
+        block_idx = getattr(callee, "block_arg_index", -1)
+        if instruction.data["block"] is None or block_idx == -1:
+            if instruction.data["block"] is not None:
+                raise TypeError(f"function '{instruction.data['identifier']}' does not take a block")
+            if isinstance(callee, Function):
+                return callee.createFrame((val,), self)
+            callee(val)
+            return None
+
+        final_args = []
+        if isinstance(val, tuple):
+            final_args = list(val)
+        elif val is not None and val != "":
+            final_args = [val]
+        
+        # Insert lambda at correct position
+        # Make sure list is long enough
+        while len(final_args) < block_idx:
+            final_args.append(None)
+        
+        # If we need to insert
+        if len(final_args) == block_idx:
+             final_args.append(self.findValue(instruction.data["block"]))
         else:
-            self.mode_stack[-1]["buffer"] += self.char.string
+             # Override or insert?
+             # If user provided something, we might override it or fail.
+             # Assuming insert strictly at index for now.
+             final_args.insert(block_idx, self.findValue(instruction.data["block"]))
+             
+        if isinstance(callee, Function):
+            return callee.createFrame((tuple(final_args),), self)
+        callee(tuple(final_args))
+        return None
 
     def parseMath(self) -> None:
-        if self.char.isdigit() or self.char.string in "+-*/%^":
-            self.mode_stack[-1]["buffer"] += self.char.string
-        else:
-            self.mode_stack.pop()
-            evaluated: int | float = eval(self.mode_stack[-1]["buffer"])
-            self.mode_stack[-1]["buffer"] = str(evaluated)
-            self.parseChar()
-
-    def parseComment(self) -> None:
-        if self.char.string == "\n":
-            self.mode_stack.pop()
+        if self.token.type == "NUMBER" or self.token.getString() in ("+", "-", "*", "/", "%", "^"):
+            return
+        mode = self.mode_stack.pop()
+        # a bare arithmetic statement has no parent to receive its value, it is only checked
+        eval(self.source[mode["start"]:self.token.start])
+        self.parseToken()
 
-    def parseMLComment(self) -> None:
-        buffer = self.mode_stack[-1].get("check_buffer", "")
-        if self.char.string == "*" and not buffer:
-            self.mode_stack[-1]["check_buffer"] = "*"
-        elif self.char.string == "/" and buffer == "*":
+    def parseArtifact(self) -> None:
+        if self.token.getString() == ">":
+            buffer = self.source[self.mode_stack[-1]["start"]:self.token.start]
+            if buffer.split()[0] == "import":
+                self.code.append(Instruction("IMPORT", self.token.start, module=buffer.split()[1]))
+            else:
+                raise ValueError(f"unknown artifact '{buffer.split()[0]}'")
             self.mode_stack.pop()
-        else:
-            self.mode_stack[-1]["check_buffer"] = ""
 
-    def parseArtifact(self) -> None:
-        if self.char.string == ">":
-            if self.mode_stack[-1]["buffer"].split()[0] == "import":
-                path: str = ""
-                if ospath.exists(f"{self.mode_stack[-1]['buffer'].split()[1]}.sv"):
-                    path = f"{self.mode_stack[-1]['buffer'].split()[1]}.sv"
-                elif ospath.exists(f"{ospath.dirname(__file__)}/../../reach/{self.mode_stack[-1]['buffer'].split()[1]}.sv"):
-                    path = f"{ospath.dirname(__file__)}/../../reach/{self.mode_stack[-1]['buffer'].split()[1]}.sv"
-                else:
-                    raise ModuleNotFoundError(f"module '{self.mode_stack[-1]['buffer'].split()[1]}' not found locally or in reach.")
-                module_parser: Parser = Parser(File(path))
+    def runImport(self, instruction: Instruction) -> None:
+        stats.imports += 1
+        module_name = instruction.data["module"]
+        path: str = module_registry.find(module_name)
+        # the file whose code holds the import, which is not this parser's inside a function from another module
+        frame = self.sys_stack[-1] if self.sys_stack else None
+        importer = frame.function.parser if frame is not None and frame.function is not None else self
+        module_registry.addImport(importer.file.getPath(), path)
+        mod: Module | None = module_registry.get(path)
+        if mod is None:
+            stats.module_loads += 1
+            with stats.phase("read"):
+                module_file: File = File(path)
+            module_parser: Parser = Parser(module_file)
+            module_parser.sys_stack = self.sys_stack
+            # registered before it runs, so circular imports see the partially executed module
+            mod = Module(module_name, path, module_parser.pool)
+            module_registry.add(mod)
+            try:
                 parsed: ParsedMaterial = module_parser.parse()
                 parsed.execute()
-                
-                # Namespace logic
-                class Module: pass
-                mod = Module()
-                defaults = Parser(File("dummy", no_read=True)).pool.keys()
-                for name, var in module_parser.pool.items():
-                    if name not in defaults:
-                        setattr(mod, name, var.value)
-                
-                module_name = self.mode_stack[-1]['buffer'].split()[1]
-                self.pool[module_name] = Variable(module_name, mod, "module", {}, self)
-            else:
-                raise ValueError(f"unknown artifact '{self.mode_stack[-1]['buffer'].split()[0]}'")
-            self.mode_stack.pop()
-        else:
-            self.mode_stack[-1]["buffer"] += self.char.string
\ No newline at end of file
+            except BaseException:
+                module_registry.remove(path)
+                raise
+        
+        self.pool[module_name] = Variable(module_name, mod, "module", {}, self)
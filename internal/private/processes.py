@@ -0,0 +1,111 @@
+import os
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from subprocess import PIPE, Popen
+from tempfile import TemporaryFile
+from threading import Lock, Semaphore, Timer
+from time import perf_counter
+
+from ..public.process import Process
+from .budgets import budgets
+from .stats import stats
+
+
+class ProcessPool:
+    def __init__(self, max_processes: int | None = None) -> None:
+        self.max_processes: int = max_processes or os.cpu_count() or 4
+        self.executor: ThreadPoolExecutor | None = None
+        self.slots: Semaphore | None = None
+        self.output_lock: Lock = Lock()
+        self.running: list[Process] = []
+
+    def start(self) -> None:
+        # created on first use so --max-procs can still change the cap
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.max_processes, thread_name_prefix="servo-process")
+            self.slots = Semaphore(self.max_processes)
+
+    def execute(self, command: str) -> int:
+        # output is echoed line by line as it arrives, stderr only goes to disk until it is needed
+        self.start()
+        stats.spawns += 1
+        with self.slots, TemporaryFile("w+") as errors:
+            timeout: float | None = budgets.getSubprocessTimeout()
+            started: float = perf_counter()
+            # under a budget the command gets its own process group, so whatever the shell started is killed with it
+            group: bool = budgets.isActive()
+            # start_new_session rather than process_group, which python 3.10 does not have
+            with Popen(command, shell=True, stdout=PIPE, stderr=errors, text=True, bufsize=1, **({"start_new_session": True} if group else {})) as process:
+                kill = (lambda: self.killGroup(process.pid)) if group else process.kill
+                # a command outliving the subprocess budget is killed rather than waited for
+                timer: Timer | None = Timer(timeout, kill) if timeout is not None else None
+                if timer is not None:
+                    timer.start()
+                try:
+                    for line in process.stdout:
+                        with self.output_lock:
+                            print(line, end="", flush=True)
+                except BaseException:
+                    # interrupted by a budget, the command goes down with the script
+                    kill()
+                    raise
+                finally:
+                    if timer is not None:
+                        timer.cancel()
+            # raises once the budget is used up, which a killed command always has
+            budgets.chargeSubprocess(perf_counter() - started)
+            if process.returncode != 0:
+                errors.seek(0)
+                raise ValueError(errors.read())
+        return process.returncode
+
+    def killGroup(self, pid: int) -> None:
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def spawn(self, command: str) -> Process:
+        self.start()
+        process = Process(command, self.executor.submit(self.execute, command))
+        # kept until a wait collects it, even once it has finished, so its failure is never lost
+        self.running.append(process)
+        return process
+
+    def wait(self, process: Process) -> int:
+        self.collect([process])
+        return process.wait()
+
+    def waitAll(self, processes: list[Process] | None = None) -> list[int]:
+        processes = list(self.running) if processes is None else processes
+        self.collect(processes)
+        codes: list[int] = []
+        failure: Exception | None = None
+        for process in processes:
+            # every process is waited for before the first failure is reported
+            try:
+                codes.append(process.wait())
+            except Exception as error:
+                failure = failure or error
+        if failure is not None:
+            raise failure
+        return codes
+
+    def collect(self, processes: list[Process]) -> None:
+        collected: set[int] = {id(process) for process in processes}
+        self.running = [running for running in self.running if id(running) not in collected]
+
+    def shutdown(self, check: bool = True) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        uncollected, self.running = self.running, []
+        if not check:
+            return
+        for process in uncollected:
+            try:
+                process.wait()
+            except Exception as error:
+                raise ValueError(f"spawned command '{process.command}' failed and was never waited for: {error}".rstrip()) from error
+
+process_pool: ProcessPool = ProcessPool()
@@ -0,0 +1,63 @@
+from time import perf_counter
+
+from ..public.layer import Layer
+
+
+class Profiler:
+    def __init__(self) -> None:
+        self.enabled: bool = False
+        # name -> [calls, inclusive seconds, exclusive seconds]
+        self.functions: dict[str, list] = {}
+        self.modules: dict[str, float] = {}
+        self.edges: dict[tuple[str, str], int] = {}
+        self.stacks: dict[str, float] = {}
+        self.active: dict[str, int] = {}
+
+    def enter(self, layer: Layer) -> None:
+        stack: list[Layer] = layer.parser.sys_stack
+        if stack:
+            edge: tuple[str, str] = (stack[-1].name, layer.name)
+            self.edges[edge] = self.edges.get(edge, 0) + 1
+        stack.append(layer)
+        self.active[layer.name] = self.active.get(layer.name, 0) + 1
+        layer.started = perf_counter()
+
+    def leave(self, layer: Layer) -> None:
+        elapsed: float = perf_counter() - layer.started
+        stack: list[Layer] = layer.parser.sys_stack
+        stack.pop()
+        exclusive: float = elapsed - layer.child_time
+        if stack:
+            stack[-1].child_time += elapsed
+        self.active[layer.name] -= 1
+        entry: list = self.functions.setdefault(layer.name, [0, 0.0, 0.0])
+        entry[0] += 1
+        # recursive calls are already inside the outermost call's inclusive time
+        if not self.active[layer.name]:
+            entry[1] += elapsed
+        entry[2] += exclusive
+        module: str = layer.name.split(".")[0]
+        self.modules[module] = self.modules.get(module, 0.0) + exclusive
+        path: str = ";".join([frame.name for frame in stack] + [layer.name])
+        self.stacks[path] = self.stacks.get(path, 0.0) + exclusive
+
+    def report(self) -> str:
+        lines: list[str] = [f"{'calls':>8} {'inclusive ms':>13} {'exclusive ms':>13} {'per call us':>12}  function"]
+        for name, (calls, inclusive, exclusive) in sorted(self.functions.items(), key=lambda item: -item[1][2]):
+            lines.append(f"{calls:>8} {inclusive * 1000:>13.3f} {exclusive * 1000:>13.3f} {exclusive / calls * 1e6:>12.2f}  {name}")
+        lines += ["", f"{'exclusive ms':>13}  module"]
+        for module, exclusive in sorted(self.modules.items(), key=lambda item: -item[1]):
+            lines.append(f"{exclusive * 1000:>13.3f}  {module}")
+        lines += ["", f"{'calls':>8}  caller -> callee"]
+        for (caller, callee), calls in sorted(self.edges.items(), key=lambda item: -item[1]):
+            lines.append(f"{calls:>8}  {caller} -> {callee}")
+        return "\n".join(lines)
+
+    def writeCollapsed(self, path: str) -> None:
+        # the folded format flamegraph.pl and speedscope read, weighted in microseconds
+        with open(path, "w") as f:
+            for stack, exclusive in sorted(self.stacks.items()):
+                f.write(f"{stack} {round(exclusive * 1e6)}\n")
+
+
+profiler: Profiler = Profiler()
@@ -0,0 +1,30 @@
+from .parser import Parser
+from ..public.safe import safe
+
+try:
+    import readline # noqa: F401 - line editing and history for input() when available
+except ImportError:
+    pass
+
+
+class Repl:
+    def __init__(self, parser: Parser) -> None:
+        self.parser: Parser = parser
+
+    def run(self) -> None:
+        feed = safe(self.parser.feed, "servo.repl")
+        while True:
+            try:
+                line: str = input("... " if self.parser.pending else ">>> ")
+            except EOFError:
+                print()
+                return
+            except KeyboardInterrupt:
+                print()
+                self.parser.reset()
+                continue
+            try:
+                feed(line + "\n", interactive=True)
+            except Exception:
+                # already reported by safe, drop whatever was left of the statement
+                self.parser.reset()
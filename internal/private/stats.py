@@ -0,0 +1,67 @@
+import json
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Iterator
+
+from .codecache import code_cache
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.parsers: int = 0
+        self.tokens: int = 0
+        self.evals: int = 0
+        self.lookups: int = 0
+        self.lookup_misses: int = 0
+        self.calls: int = 0
+        self.imports: int = 0
+        self.module_loads: int = 0
+        self.disk_cache_hits: int = 0
+        self.spawns: int = 0
+        self.phases: dict[str, float] = {"read": 0.0, "parse": 0.0, "execute": 0.0}
+        self.phase_stack: list[list] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        # phases nest (a module is read and parsed while the script executes), each one only keeps its own time
+        entry: list = [name, 0.0]
+        self.phase_stack.append(entry)
+        started: float = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed: float = perf_counter() - started
+            self.phase_stack.pop()
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed - entry[1]
+            if self.phase_stack:
+                self.phase_stack[-1][1] += elapsed
+
+    def getCounters(self) -> dict[str, Any]:
+        return {
+            "parsers": self.parsers,
+            "tokens": self.tokens,
+            "evals": self.evals,
+            "lookups": self.lookups,
+            "lookup_misses": self.lookup_misses,
+            "calls": self.calls,
+            "imports": self.imports,
+            "module_loads": self.module_loads,
+            "disk_cache_hits": self.disk_cache_hits,
+            "spawns": self.spawns,
+            "code_cache": code_cache.getStats(),
+            "phases": dict(self.phases)
+        }
+
+    def report(self, output_format: str = "text") -> str:
+        counters: dict[str, Any] = self.getCounters()
+        if output_format == "json":
+            return json.dumps(counters)
+        phases: dict[str, float] = counters.pop("phases")
+        cache: dict[str, int] = counters.pop("code_cache")
+        lines: list[str] = [f"{name:<20} {value}" for name, value in counters.items()]
+        lines += ["code cache:"] + [f"    {name:<16} {value}" for name, value in cache.items()]
+        lines += ["phases (ms):"] + [f"    {name:<16} {value * 1000:.3f}" for name, value in phases.items()]
+        return "\n".join(lines)
+
+
+stats: Stats = Stats()
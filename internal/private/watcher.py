@@ -0,0 +1,133 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import time
+from time import perf_counter
+from typing import Callable
+
+from ..public.safe import safe
+from .files import file_table
+from .modules import module_registry
+from .processes import process_pool
+
+# IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+INOTIFY_MASK: int = 0x002 | 0x004 | 0x008 | 0x040 | 0x080 | 0x100 | 0x200
+# editors save in several steps, events arriving this soon after the first belong to the same change
+SETTLE_SECONDS: float = 0.05
+
+
+class Inotify:
+    def __init__(self) -> None:
+        self.libc: ctypes.CDLL = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd: int = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories: set[str] = set()
+
+    def watch(self, directory: str) -> None:
+        # directories rather than files, so saves that replace the file by renaming are still seen
+        if directory not in self.directories and self.libc.inotify_add_watch(self.fd, os.fsencode(directory), INOTIFY_MASK) >= 0:
+            self.directories.add(directory)
+
+    def wait(self, timeout: float) -> bool:
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return False
+        time.sleep(SETTLE_SECONDS)
+        try:
+            while os.read(self.fd, 1 << 16):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class Watcher:
+    def __init__(self, run: Callable[[], None], path: str, interval: float = 0.25) -> None:
+        def runCollected() -> None:
+            run()
+            # a spawned command failing unwaited fails the run, as it does outside --watch
+            process_pool.shutdown()
+        self.run: Callable[[], None] = safe(runCollected, "servo.watch")
+        self.path: str = os.path.abspath(path)
+        self.interval: float = interval
+        self.inotify: Inotify | None = None
+        if sys.platform.startswith("linux"):
+            try:
+                self.inotify = Inotify()
+            except (OSError, AttributeError):
+                # no inotify, or libc without it: stat the files every interval instead
+                self.inotify = None
+
+    def getDisplayPath(self, path: str) -> str:
+        relative: str = os.path.relpath(path)
+        return path if relative.startswith("..") else relative
+
+    def getTracked(self) -> set[str]:
+        tracked: set[str] = {self.path, *module_registry.modules}
+        for imported in module_registry.imports.values():
+            tracked |= imported
+        return tracked
+
+    def getSignature(self, path: str) -> tuple[int, int] | None:
+        try:
+            status = os.stat(path)
+        except OSError:
+            return None
+        return (status.st_mtime_ns, status.st_size)
+
+    def snapshot(self, paths: set[str]) -> dict[str, tuple[int, int] | None]:
+        return {path: self.getSignature(path) for path in paths}
+
+    def runOnce(self) -> None:
+        try:
+            self.run()
+        except Exception:
+            # already reported, the next change gets another try
+            pass
+        finally:
+            process_pool.shutdown(check=False)
+            file_table.closeAll()
+
+    def waitForChange(self, signatures: dict[str, tuple[int, int] | None]) -> set[str]:
+        while True:
+            if self.inotify is not None:
+                for path in signatures:
+                    self.inotify.watch(os.path.dirname(path))
+                if not self.inotify.wait(1.0):
+                    continue
+            else:
+                time.sleep(self.interval)
+            changed: set[str] = {path for path, signature in signatures.items() if self.getSignature(path) != signature}
+            if changed:
+                return changed
+
+    def watch(self) -> None:
+        # modules stay loaded between runs, only changed files and the files importing them are compiled and run again
+        module_registry.retain = True
+        print(f"\033[1m[servo]\033[0m watching {self.getDisplayPath(self.path)} ({'inotify' if self.inotify is not None else 'polling'}), ctrl-c to stop", file=sys.stderr)
+        signatures: dict[str, tuple[int, int] | None] = self.snapshot(self.getTracked())
+        started: float = perf_counter()
+        self.runOnce()
+        print(f"\033[1m[servo]\033[0m ran in {(perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+        try:
+            while True:
+                signatures.update({path: self.getSignature(path) for path in self.getTracked() - signatures.keys()})
+                changed: set[str] = self.waitForChange(signatures)
+                # taken before running, so a save during the run is picked up by the next round
+                signatures = self.snapshot(self.getTracked())
+                started = perf_counter()
+                stale: set[str] = module_registry.invalidate(changed)
+                self.runOnce()
+                names: str = ", ".join(sorted(self.getDisplayPath(path) for path in changed))
+                reloaded: int = len(stale | {self.path})
+                print(f"\033[1m[servo]\033[0m {names} changed, reloaded {reloaded} file{'s' if reloaded != 1 else ''} in {(perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.inotify is not None:
+                self.inotify.close()
@@ -0,0 +1,60 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Callable
+
+from ..public.function import Function, running
+
+# the tasks of the running process pool call, inherited by its forked workers instead of pickled
+pending: list[tuple[Callable, tuple]] = []
+
+
+def invoke(function: Callable, args: tuple) -> Any:
+    if not isinstance(function, Function):
+        # host builtins take their arguments the way runCall passes them
+        return function(*args) if len(args) < 2 else function(args)
+    caller_parser = getattr(running, "parser", None)
+    running.parser = function.parser.createWorker()
+    try:
+        return function(args)
+    finally:
+        running.parser = caller_parser
+
+
+def invokePending(index: int) -> Any:
+    function, args = pending[index]
+    return invoke(function, args)
+
+
+class WorkerPool:
+    def __init__(self, max_workers: int | None = None, kind: str = "thread") -> None:
+        self.max_workers: int = max_workers or os.cpu_count() or 4
+        self.kind: str = kind
+
+    def run(self, tasks: list[tuple[Callable, tuple]]) -> list[Any]:
+        # results come back in task order whichever worker finishes first
+        if len(tasks) < 2 or self.max_workers < 2:
+            return [invoke(function, args) for function, args in tasks]
+        if self.kind == "process":
+            return self.runProcesses(tasks)
+        with ThreadPoolExecutor(min(self.max_workers, len(tasks)), thread_name_prefix="servo-worker") as executor:
+            return list(executor.map(lambda task: invoke(*task), tasks))
+
+    def runProcesses(self, tasks: list[tuple[Callable, tuple]]) -> list[Any]:
+        global pending
+        outer: list[tuple[Callable, tuple]] = pending
+        pending = tasks
+        try:
+            with ProcessPoolExecutor(min(self.max_workers, len(tasks)), mp_context=get_context("fork")) as executor:
+                return list(executor.map(invokePending, range(len(tasks))))
+        finally:
+            pending = outer
+
+    def parallel(self, functions: list[Callable]) -> list[Any]:
+        return self.run([(function, ()) for function in functions])
+
+    def map(self, function: Callable, items: list[Any]) -> list[Any]:
+        return self.run([(function, (item,)) for item in items])
+
+
+worker_pool: WorkerPool = WorkerPool()
@@ -1,73 +1,77 @@
+import mmap
 import os
 import shutil
-
-from .safe import safe
+from typing import Iterator, TextIO
 
 
 class File:
     def __init__(self, path: str, no_read: bool = False) -> None:
         self.path: str = os.path.abspath(path)
         self.content: str | None = None
+        self.writer: TextIO | None = None
         if not no_read:
             self.read()
-    @safe
     def read(self) -> str:
-        """servo.internal.public.file"""
         if not self.path:
             raise ValueError("read() while path still not provided to File object.")
+        self.flush()
         with open(self.path) as f:
-            self.content = f.read() + " " # add one whitespace character to handle EOF
+            self.content = f.read()
             return self.content
-    @safe
+    def readLines(self) -> Iterator[str]:
+        # one line at a time, the file is never held in memory as a whole
+        self.flush()
+        with open(self.path) as f:
+            yield from f
+    def map(self) -> mmap.mmap | bytes:
+        # the pages are shared with the page cache, slicing only copies the slice
+        self.flush()
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b""
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
     def write(self, content: str, mode: str = "w") -> None:
-        """servo.internal.public.file"""
         if not self.path:
             raise ValueError("write() while path still not provided to File object.")
+        self.close()
         with open(self.path, mode) as f:
             f.write(content)
             self.content = content
-    @safe
+    def append(self, content: str) -> None:
+        # appends stay in one buffered handle until the file is read, closed or flushed
+        if self.writer is None:
+            self.writer = open(self.path, "a", buffering=1 << 16)
+        self.writer.write(content)
+        self.content = None
+    def flush(self) -> None:
+        if self.writer is not None:
+            self.writer.flush()
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
     def getContent(self) -> str:
-        """servo.internal.public.file"""
         return self.content
-    @safe
     def getPath(self) -> str:
-        """servo.internal.public.file"""
         return self.path
-    @safe
     def getExtension(self) -> str:
-        """servo.internal.public.file"""
         return self.path.split(".")[-1]
-    @safe
     def getBaseName(self) -> str:
-        """servo.internal.public.file"""
         return self.path.replace("\\", "/").split("/")[-1]
-    @safe
     def getParts(self) -> list[str]:
-        """servo.internal.public.file"""
         return self.path.replace("\\", "/").split("/")
-    @safe
     def getParent(self) -> str:
-        """servo.internal.public.file"""
         return "/".join(self.getParts()[:-1])
-    @safe
     def getChild(self, *tree: str) -> str:
-        """servo.internal.public.file"""
         return "/".join([self.path] + list(tree))
-    @safe
     def getType(self) -> str | None:
-        """servo.internal.public.file"""
         if os.path.isdir(self.path):
             return "dir"
         elif os.path.isfile(self.path):
             return "file"
-    @safe
     def getExists(self) -> bool:
-        """servo.internal.public.file"""
         return bool(self.getType())
-    @safe
     def delete(self) -> bool:
-        """servo.internal.public.file"""
         if self.getType() == "file":
             os.remove(self.path)
             return True
@@ -75,9 +79,7 @@ class File:
             shutil.rmtree(self.path)
             return True
         return False
-    @safe
     def createDirectory(self) -> bool:
-        """servo.internal.public.file"""
         if not self.getExists():
             os.mkdir(self.path)
             return True
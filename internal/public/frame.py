@@ -0,0 +1,18 @@
+from typing import Any
+
+from .instruction import Instruction
+from .layer import Layer
+
+
+class Frame(Layer):
+    __slots__ = ("code", "scope", "module", "function", "pc", "iterators")
+
+    def __init__(self, name: str, frame_type: str, parser: "Parser", code: list[Instruction], scope: "Scope", module: str, function: Any = None) -> None:
+        super().__init__(name, frame_type, parser)
+        self.code: list[Instruction] = code
+        self.scope: "Scope" = scope
+        self.module: str = module
+        self.function: Any = function
+        self.pc: int = 0
+        # for loops running in this frame, created on first use
+        self.iterators: dict[int, Any] | None = None
@@ -0,0 +1,56 @@
+from threading import local
+from typing import Any
+
+from .frame import Frame
+from .instruction import Instruction
+from .scope import Scope
+from .string import String
+from .variable import Variable
+
+
+# the parser whose frame loop is active on this thread, worker threads run their own
+running: local = local()
+
+
+def getArgs(args: tuple) -> tuple:
+    # a statement call passes its arguments as one tuple, an expression passes them separately
+    return args[0] if len(args) == 1 and isinstance(args[0], tuple) else args
+
+
+class Function:
+    def __init__(self, name: str, args: list[str], body: list[Instruction], scope: Scope, module: str, parser: "Parser", source: tuple[int, int, str] | None = None) -> None:
+        self.name: str = name
+        self.qualified_name: str = f"{module}.{name}"
+        self.module: str = module
+        self.body: list[Instruction] = body
+        self.scope: Scope = scope
+        self.parser: "Parser" = parser
+        # (stream offset, line base, text) of its definition, only kept for streamed code whose chunk is gone
+        self.source: tuple[int, int, str] | None = source
+        self.args: list[str] = []
+        self.block_arg_index: int = -1
+        for i, arg in enumerate(args):
+            if arg.startswith("{") and arg.endswith("}"):
+                if self.block_arg_index != -1:
+                    raise ValueError("multiple block arguments not supported")
+                self.args.append(arg[1:-1])
+                self.block_arg_index = i
+            else:
+                self.args.append(arg)
+
+    def __call__(self, *call_args: Any) -> Any:
+        # called from inside an expression, the running parser runs the frame on top of its stack
+        parser = getattr(running, "parser", None) or self.parser
+        return parser.runFrame(self.createFrame(call_args, parser))
+
+    def bind(self, call_args: tuple) -> Scope:
+        actual_args = list(getArgs(call_args))
+        if len(actual_args) == 1 and actual_args[0] == "":
+             actual_args = []
+        scope = Scope(parent=self.scope)
+        for arg_name, value in zip(self.args, actual_args):
+            scope[arg_name] = Variable(arg_name, String(value) if type(value) is str else value, "arg", {}, self.parser)
+        return scope
+
+    def createFrame(self, call_args: tuple, parser: "Parser") -> Frame:
+        return Frame(self.qualified_name, "func", parser, self.body, self.bind(call_args), self.module, self)
@@ -0,0 +1,8 @@
+from typing import Any
+
+
+class Instruction:
+    def __init__(self, op: str, index: int, **data: Any) -> None:
+        self.op: str = op
+        self.index: int = index
+        self.data: dict[str, Any] = data
@@ -1,16 +1,17 @@
-from .safe import safe
+from time import perf_counter
+
 
 class Layer:
+    __slots__ = ("name", "type", "parser", "index", "started", "child_time")
+
     def __init__(self, name: str, layer_type: str, parser: "Parser") -> None:
         self.name: str = name
         self.type: str = layer_type
         self.parser: "Parser" = parser
-        self.index: int = len(parser.stack) - 1
-    @safe
+        self.index: int = len(parser.sys_stack)
+        self.started: float = perf_counter()
+        self.child_time: float = 0.0
     def getAbove(self) -> "Layer":
-        """servo.internal.public.layer"""
-        return self.parser.stack[self.index - 1]
-    @safe
+        return self.parser.sys_stack[self.index - 1]
     def getBelow(self) -> "Layer":
-        """servo.internal.public.layer"""
-        return self.parser.stack[self.index + 1]
\ No newline at end of file
+        return self.parser.sys_stack[self.index + 1]
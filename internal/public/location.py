@@ -0,0 +1,36 @@
+from bisect import bisect_right
+
+
+class Location:
+    def __init__(self, path: str, source: str, offset: int, line_base: int = 0) -> None:
+        self.path: str = path
+        self.source: str = source
+        self.offset: int = offset
+        self.line_base: int = line_base
+        self.line_starts: list[int] | None = None
+
+    def getLineStarts(self) -> list[int]:
+        # only built once an error actually needs a position
+        if self.line_starts is None:
+            self.line_starts = [0]
+            position = self.source.find("\n")
+            while position != -1:
+                self.line_starts.append(position + 1)
+                position = self.source.find("\n", position + 1)
+        return self.line_starts
+
+    def getLineColumn(self) -> tuple[int, int]:
+        line = bisect_right(self.getLineStarts(), self.offset) - 1
+        return self.line_base + line + 1, self.offset - self.line_starts[line] + 1
+
+    def getExcerpt(self) -> str:
+        line, column = self.getLineColumn()
+        start = self.line_starts[line - self.line_base - 1]
+        text = self.source[start:self.source.find("\n", start) if "\n" in self.source[start:] else len(self.source)]
+        return f"{line:>6} | {text.rstrip()}\n       | {' ' * (column - 1)}^"
+
+    def __str__(self) -> str:
+        if not 0 <= self.offset <= len(self.source):
+            return self.path
+        line, column = self.getLineColumn()
+        return f"{self.path}:{line}:{column}"
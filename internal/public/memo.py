@@ -0,0 +1,78 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable
+
+from .function import getArgs
+
+
+class Memo:
+    def __init__(self, function: Callable, maxsize: int = 128, ttl: float | None = None) -> None:
+        self.function: Callable = function
+        self.maxsize: int = maxsize
+        self.ttl: float | None = ttl
+        # key -> (value, expiry or None)
+        self.entries: OrderedDict[tuple, tuple[Any, float | None]] = OrderedDict()
+        self.lock: Lock = Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.expirations: int = 0
+        self.uncached: int = 0
+        # a memoised function still takes its trailing block where the function did
+        self.block_arg_index: int = getattr(function, "block_arg_index", -1)
+
+    def getKey(self, call_args: tuple) -> tuple | None:
+        args = getArgs(call_args)
+        if any(callable(arg) for arg in args):
+            # blocks are new functions on every call, they would never hit
+            return None
+        try:
+            hash(args)
+        except TypeError:
+            return None
+        return args
+
+    def __call__(self, *call_args: Any) -> Any:
+        key = self.getKey(call_args)
+        if key is None:
+            self.uncached += 1
+            return self.function(*call_args)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[1] is None or entry[1] > monotonic():
+                    self.hits += 1
+                    self.entries.move_to_end(key)
+                    return entry[0]
+                del self.entries[key]
+                self.expirations += 1
+            self.misses += 1
+        # the lock is not held while the body runs, recursive calls come back through here
+        value = self.function(*call_args)
+        with self.lock:
+            self.entries[key] = (value, None if self.ttl is None else monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = self.uncached = 0
+
+    def getStats(self) -> dict[str, int]:
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "uncached": self.uncached
+        }
+
+    def __repr__(self) -> str:
+        return f"<memo {getattr(self.function, 'qualified_name', self.function)} {self.getStats()}>"
@@ -0,0 +1,17 @@
+from typing import Any
+
+from .string import flatten
+
+
+class Module:
+    def __init__(self, name: str, path: str, scope: "Scope") -> None:
+        self.__name__: str = name
+        self.__file__: str = path
+        self.__scope__: "Scope" = scope
+
+    def __getattr__(self, name: str) -> Any:
+        # only what the module defined itself, not the builtins its scope falls through to
+        variable = dict.get(self.__scope__, name)
+        if variable is None:
+            raise AttributeError(f"module '{self.__name__}' has no attribute '{name}'")
+        return flatten(variable.value)
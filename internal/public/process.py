@@ -0,0 +1,18 @@
+from concurrent.futures import Future
+
+
+class Process:
+    def __init__(self, command: str, future: Future) -> None:
+        self.command: str = command
+        self.future: Future = future
+
+    def wait(self) -> int:
+        # re-raises the command's failure in the waiting thread
+        return self.future.result()
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def __repr__(self) -> str:
+        state = "done" if self.done() else "running"
+        return f"<process '{self.command}' {state}>"
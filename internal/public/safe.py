@@ -15,7 +15,11 @@ def safe(func: Callable, file_name: str | None = None) -> Callable:
                 error_name += char.upper()
             error_name = error_name.strip().replace("ERROR", "FATAL")
             file_name = file_name or (func.__doc__ or "<unknown>").split('\n')[0].strip()
-            print(f"\033[1m[servo]\033[0;91m got '{error_name}' from {func.__name__}() in '{file_name}':\n      - {error}\033[0m")
+            location = getattr(error, "location", None)
+            if location is not None and str(location) != location.path:
+                print(f"\033[1m[servo]\033[0;91m got '{error_name}' at {location}:\n      - {error}\n{location.getExcerpt()}\033[0m")
+            else:
+                print(f"\033[1m[servo]\033[0;91m got '{error_name}' from {func.__name__}() in '{file_name}':\n      - {error}\033[0m")
             if file_name == "servo.base" and "-v" not in argv:
                 print("\033[91m      - exit with code 1\033[0m")
                 sysexit(1)
@@ -0,0 +1,110 @@
+from typing import Any
+
+from .string import Rope, String, flatten
+from .variable import Variable
+
+
+class Scope(dict):
+    """A pool of variables whose lookups fall through to its parent scope (globals -> module -> call frame)."""
+    # bumped whenever a scope that some namespace resolved a name through is rebound
+    epoch: int = 0
+
+    def __init__(self, variables: dict[str, Variable] | None = None, parent: "Scope | None" = None) -> None:
+        super().__init__(variables or {})
+        self.parent: Scope | None = parent
+        self.shared: bool = False
+        self.namespace: Namespace = Namespace(self)
+
+    def __setitem__(self, name: str, variable: Variable) -> None:
+        dict.__setitem__(self, name, variable)
+        self.namespace.bind(name, variable.value)
+        if self.shared:
+            Scope.epoch += 1
+
+    def __delitem__(self, name: str) -> None:
+        dict.__delitem__(self, name)
+        self.namespace.unbind(name)
+        if self.shared:
+            Scope.epoch += 1
+
+    def __missing__(self, name: str) -> Variable:
+        if self.parent is None:
+            raise KeyError(name)
+        return self.parent[name]
+
+    def __contains__(self, name: object) -> bool:
+        return dict.__contains__(self, name) or (self.parent is not None and name in self.parent)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+
+class Namespace(dict):
+    """eval() globals for a Scope: its own bindings are written through, outer names are cached on first use."""
+    def __init__(self, scope: Scope) -> None:
+        super().__init__(String=String)
+        self.scope: Scope = scope
+        self.cached: set[str] = set()
+        # base name -> dotted names cached through it, dropped when the base is rebound
+        self.dotted: dict[str, set[str]] = {}
+        self.epoch: int = Scope.epoch
+        for name, variable in dict.items(scope):
+            if type(variable.value) is not Rope:
+                dict.__setitem__(self, name, variable.value)
+
+    def __missing__(self, name: str) -> Any:
+        variable = dict.get(self.scope, name)
+        if variable is not None:
+            # a rope bound in this scope is joined on its first read
+            value = flatten(variable.value)
+            dict.__setitem__(self, name, value)
+            return value
+        scope = self.scope.parent
+        while scope is not None:
+            # any later rebinding along this path may shadow or replace what gets cached here
+            scope.shared = True
+            variable = dict.get(scope, name)
+            if variable is not None:
+                value = flatten(variable.value)
+                self.cache(name, value)
+                return value
+            scope = scope.parent
+        raise KeyError(name)
+
+    def bind(self, name: str, value: Any) -> None:
+        if type(value) is Rope:
+            dict.pop(self, name, None)
+        else:
+            dict.__setitem__(self, name, value)
+        self.cached.discard(name)
+        if name in self.dotted:
+            self.dropDotted(name)
+
+    def unbind(self, name: str) -> None:
+        dict.pop(self, name, None)
+        self.cached.discard(name)
+        if name in self.dotted:
+            self.dropDotted(name)
+
+    def cache(self, name: str, value: Any) -> None:
+        dict.__setitem__(self, name, value)
+        self.cached.add(name)
+        if "." in name:
+            self.dotted.setdefault(name.split(".", 1)[0], set()).add(name)
+
+    def dropDotted(self, base: str) -> None:
+        for name in self.dotted.pop(base):
+            dict.pop(self, name, None)
+            self.cached.discard(name)
+
+    def refresh(self) -> None:
+        # drop cached outer names once anything they were resolved through has been rebound
+        if self.epoch != Scope.epoch:
+            for name in self.cached:
+                dict.pop(self, name, None)
+            self.cached.clear()
+            self.dotted.clear()
+            self.epoch = Scope.epoch
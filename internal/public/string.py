@@ -1,3 +1,4 @@
+import threading
 from typing import Any
 
 class String(str):
@@ -6,3 +7,45 @@ class String(str):
 
     def __radd__(self, other: Any) -> "String":
         return String(str(other) + str(self))
+
+
+class Rope:
+    """Text a variable accumulates through `s = s + ...`: pieces are appended to a list and joined when the variable is read."""
+    def __init__(self, pieces: list[str]) -> None:
+        self.pieces: list[str] = pieces
+        self.length: int = len(pieces)
+        self.flat: String | None = None
+
+    def __add__(self, other: Any) -> "Rope":
+        piece: str = other if isinstance(other, str) else str(other)
+        # two threads extending the same version must not both append to the shared list
+        with rope_lock:
+            pieces: list[str] = self.pieces
+            if len(pieces) != self.length:
+                # an older version is being extended again, it gets its own copy of the pieces
+                pieces = pieces[:self.length]
+            pieces.append(piece)
+        return Rope(pieces)
+
+    def flatten(self) -> String:
+        if self.flat is None:
+            # a newer version may be appending to the same list, only this version's pieces are joined
+            self.flat = String("".join(self.pieces[:self.length]))
+        return self.flat
+
+    def __str__(self) -> str:
+        return self.flatten()
+
+    def __repr__(self) -> str:
+        return repr(str(self))
+
+    def __reduce__(self) -> tuple:
+        return (String, (str(self),))
+
+
+rope_lock: threading.Lock = threading.Lock()
+
+
+def flatten(value: Any) -> Any:
+    # ropes stay inside variables, everything reading a value gets the joined String
+    return value.flatten() if type(value) is Rope else value
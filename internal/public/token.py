@@ -0,0 +1,9 @@
+class Token:
+    def __init__(self, token_type: str, start: int, end: int, source: str) -> None:
+        self.type: str = token_type
+        self.start: int = start
+        self.end: int = end
+        self.source: str = source
+
+    def getString(self) -> str:
+        return self.source[self.start:self.end]
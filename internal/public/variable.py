@@ -1,6 +1,8 @@
 from typing import Any
 
 class Variable:
+    __slots__ = ("name", "value", "value_type", "parser")
+
     def __init__(self, name: str, value: Any, value_type: str, children: dict[str, "Variable"], parser: "Parser") -> None:
         self.name: str = name
         self.value: Any = value
@@ -0,0 +1,125 @@
+import operator
+import os
+import re
+from array import array
+from itertools import repeat
+from typing import Any, Callable, Iterable, Iterator
+
+try:
+    import numpy # optional, whole-array operations run in C when it is installed
+except ImportError:
+    numpy = None
+
+# separators accepted between numbers in text: whitespace, commas and semicolons
+NUMBER_SEPARATORS: re.Pattern = re.compile(r"[\s,;]+")
+
+
+class Vector:
+    """A compact float64 array whose arithmetic and reductions run over the whole array at once."""
+    backend: str = "numpy" if numpy is not None and not os.environ.get("SERVO_NO_NUMPY") else "array"
+
+    def __init__(self, values: Iterable[float] | Any = ()) -> None:
+        if Vector.backend == "numpy":
+            self.data: Any = values if isinstance(values, numpy.ndarray) else numpy.array(values if isinstance(values, (list, tuple, memoryview)) else list(values), dtype=numpy.float64)
+        else:
+            # a memoryview over the array, so slices share memory instead of copying
+            self.data = values if isinstance(values, memoryview) else memoryview(values if isinstance(values, array) else array("d", values))
+
+    @staticmethod
+    def fromLines(lines: Iterable[str]) -> "Vector":
+        return Vector(float(value) for line in lines for value in NUMBER_SEPARATORS.split(str(line).strip()) if value)
+    @staticmethod
+    def fromText(text: str) -> "Vector":
+        return Vector.fromLines([text])
+
+    def combine(self, other: Any, function: Callable, reverse: bool = False) -> "Vector":
+        if isinstance(other, Vector):
+            if len(other) != len(self):
+                raise ValueError(f"vectors of length {len(self)} and {len(other)} cannot be combined")
+            other = other.data
+        elif not isinstance(other, (int, float)):
+            return NotImplemented
+        left, right = (other, self.data) if reverse else (self.data, other)
+        if Vector.backend == "numpy":
+            return Vector(numpy.asarray(function(left, right), dtype=numpy.float64))
+        left = repeat(left) if isinstance(left, (int, float)) else left
+        right = repeat(right) if isinstance(right, (int, float)) else right
+        return Vector(array("d", map(function, left, right)))
+
+    def __add__(self, other: Any) -> "Vector":
+        return self.combine(other, operator.add)
+    def __radd__(self, other: Any) -> "Vector":
+        return self.combine(other, operator.add, True)
+    def __sub__(self, other: Any) -> "Vector":
+        return self.combine(other, operator.sub)
+    def __rsub__(self, other: Any) -> "Vector":
+        return self.combine(other, operator.sub, True)
+    def __mul__(self, other: Any) -> "Vector":
+        return self.combine(other, operator.mul)
+    def __rmul__(self, other: Any) -> "Vector":
+        return self.combine(other, operator.mul, True)
+    def __truediv__(self, other: Any) -> "Vector":
+        return self.combine(other, operator.truediv)
+    def __rtruediv__(self, other: Any) -> "Vector":
+        return self.combine(other, operator.truediv, True)
+    def __floordiv__(self, other: Any) -> "Vector":
+        return self.combine(other, operator.floordiv)
+    def __rfloordiv__(self, other: Any) -> "Vector":
+        return self.combine(other, operator.floordiv, True)
+    def __mod__(self, other: Any) -> "Vector":
+        return self.combine(other, operator.mod)
+    def __rmod__(self, other: Any) -> "Vector":
+        return self.combine(other, operator.mod, True)
+    def __pow__(self, other: Any) -> "Vector":
+        return self.combine(other, operator.pow)
+    def __rpow__(self, other: Any) -> "Vector":
+        return self.combine(other, operator.pow, True)
+
+    def __neg__(self) -> "Vector":
+        return Vector(-self.data) if Vector.backend == "numpy" else Vector(array("d", map(operator.neg, self.data)))
+    def __abs__(self) -> "Vector":
+        return Vector(abs(self.data)) if Vector.backend == "numpy" else Vector(array("d", map(abs, self.data)))
+
+    def apply(self, function: Callable[[float], float]) -> "Vector":
+        # system_math functions and servo functions alike, one call per element
+        return Vector(array("d", map(function, self)))
+
+    def sum(self) -> float:
+        return float(self.data.sum()) if Vector.backend == "numpy" else sum(self.data)
+    def min(self) -> float:
+        if not len(self):
+            raise ValueError("min() of an empty vector")
+        return float(self.data.min()) if Vector.backend == "numpy" else min(self.data)
+    def max(self) -> float:
+        if not len(self):
+            raise ValueError("max() of an empty vector")
+        return float(self.data.max()) if Vector.backend == "numpy" else max(self.data)
+    def mean(self) -> float:
+        if not len(self):
+            raise ValueError("mean() of an empty vector")
+        return self.sum() / len(self)
+
+    def __len__(self) -> int:
+        return len(self.data)
+    def __getitem__(self, key: int | slice) -> "float | Vector":
+        if isinstance(key, slice):
+            # a view over the same memory, not a copy
+            return Vector(self.data[key])
+        return float(self.data[key])
+    def __setitem__(self, key: int, value: float) -> None:
+        self.data[key] = float(value)
+    def __iter__(self) -> Iterator[float]:
+        return (float(value) for value in self.data)
+
+    def tolist(self) -> list[float]:
+        return self.data.tolist()
+    def copy(self) -> "Vector":
+        return Vector(self.data.copy()) if Vector.backend == "numpy" else Vector(array("d", self.data))
+
+    def __reduce__(self) -> tuple:
+        # memoryviews cannot be pickled, process pool workers get the values
+        return (Vector, (self.tolist(),))
+    def __repr__(self) -> str:
+        values = self.tolist()
+        shown = ", ".join(repr(value) for value in values[:8]) + (", ..." if len(values) > 8 else "")
+        return f"vector([{shown}], length={len(values)})"